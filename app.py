@@ -0,0 +1,390 @@
+# app.py
+"""
+Streamlit demo UI for ConsultX.
+
+Thin chat front-end over backend.core.orchestrator:
+  user text -> run_generate_reply -> reply + risk/guardrail meta
+
+Run from project root:
+  streamlit run app.py
+"""
+
+import collections
+import concurrent.futures
+import importlib.util
+import io
+import queue
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import streamlit as st
+
+import json
+
+try:  # Optional: fast, compact session persistence. JSON fallback below.
+    import msgpack
+except ModuleNotFoundError:  # pragma: no cover - optional helper
+    msgpack = None
+
+ROOT = Path(__file__).resolve().parent
+# Only touch sys.path when the backend package is genuinely unimportable;
+# a resolved find_spec beats a linear sys.path membership scan per rerun
+# and avoids stacking duplicate entries across sessions.
+if importlib.util.find_spec("backend") is None:
+    sys.path.insert(0, str(ROOT))
+
+
+# ------- cached resources -------
+@st.cache_resource
+def get_orchestrator():
+    """
+    Construct the heavy pipeline exactly once per worker process.
+
+    Streamlit re-runs this script on every interaction; without the
+    cache_resource wrapper the orchestrator import would re-trigger
+    model / retriever / router construction on each chat turn.
+    """
+    from backend.core import orchestrator as orch
+    return orch
+
+
+@st.cache_resource
+def get_executor():
+    """Shared worker pool so orchestrator calls run off the script thread."""
+    return concurrent.futures.ThreadPoolExecutor(max_workers=4)
+
+
+_STREAM_DONE = object()
+
+
+def stream_off_thread(gen_factory, timeout: float = 60.0):
+    """
+    Drain an orchestrator stream on a worker thread.
+
+    The network / inference work happens on the executor while the script
+    thread only pulls finished chunks from a bounded queue, so the UI keeps
+    painting and a hung backend call times out instead of freezing the run.
+    """
+    chunks: "queue.Queue" = queue.Queue(maxsize=64)
+
+    def _produce():
+        try:
+            for chunk in gen_factory():
+                chunks.put(chunk)
+        except Exception as exc:
+            chunks.put(exc)
+        finally:
+            chunks.put(_STREAM_DONE)
+
+    st.session_state["_reply_future"] = get_executor().submit(_produce)
+
+    def _consume():
+        deadline = time.monotonic() + timeout
+        while True:
+            item = chunks.get(timeout=max(0.1, deadline - time.monotonic()))
+            if item is _STREAM_DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    return _consume()
+
+
+# ------- history helpers -------
+ROLE_PREFIX = {"user": "User", "assistant": "Therapist"}
+
+# Compact message rows: a NamedTuple is a fraction of the footprint of a
+# per-message dict and makes the render/transcript loops attribute lookups
+# instead of hash probes.
+Msg = collections.namedtuple("Msg", ["role", "content", "meta"], defaults=(None,))
+
+
+@st.cache_data(max_entries=64)
+def build_history_summary(messages, max_chars: int = 400) -> str:
+    """Compact 'key concerns' line from prior user turns."""
+    user_texts = [m.content for m in messages if m.role == "user" and m.content]
+    if not user_texts:
+        return ""
+    # Walk backwards under a character budget instead of joining the full
+    # transcript and slicing the tail off afterwards.
+    budget = max_chars
+    buf = []
+    for text in reversed(user_texts):
+        if budget <= 0:
+            break
+        buf.append(text[-budget:])
+        budget -= len(text) + 3  # account for the " | " separator
+    return "Key concerns so far: " + " | ".join(reversed(buf))
+
+
+@st.cache_data
+def safety_preamble(cc: str) -> str:
+    """Country → crisis-resource text, resolved once per country per session."""
+    # guardrails is dependency-light, so this doesn't drag in the heavy
+    # orchestrator stack before the first message.
+    from backend.core import guardrails
+    return guardrails._hotline_block((cc or "").upper())
+
+
+def build_prompt_buf(summary: str, turn_lines) -> str:
+    """
+    Assemble the per-turn history context (summary + recent turns) into a
+    single contiguous buffer instead of joining intermediate strings.
+    """
+    buf = io.StringIO()
+    if summary:
+        buf.write(summary)
+    for line in turn_lines:
+        if buf.tell():
+            buf.write("\n")
+        buf.write(line)
+    return buf.getvalue()
+
+
+@st.cache_data(max_entries=64)
+def build_transcript_block(messages, max_turns: int = 6) -> str:
+    """Last few turns as 'User:/Therapist:' lines for prompt conditioning."""
+    # Walk backwards so the block always carries max_turns turns with
+    # content; slicing before filtering would silently shrink the window
+    # whenever recent messages are empty.
+    picked = []
+    for msg in reversed(messages):
+        content = (msg.content or "").strip()
+        if not content:
+            continue
+        picked.append(ROLE_PREFIX.get(msg.role, "Therapist") + ": " + content)
+        if len(picked) >= max_turns:
+            break
+    return "\n".join(reversed(picked))
+
+
+# ------- page / sidebar -------
+if not st.session_state.get("_page_cfg"):
+    st.set_page_config(page_title="ConsultX", page_icon="💬")
+    st.session_state["_page_cfg"] = True
+st.title("ConsultX — AI Therapy Demo")
+
+with st.sidebar:
+    st.header("Settings")
+    # Explicit keys let Streamlit reuse widget state across reruns instead
+    # of re-resolving defaults; values are read back from session_state.
+    st.selectbox("Country", ["US", "CA", "MX", "IN"], index=0, key="country_code")
+    st.slider("Retrieved docs (k)", 1, 8, 3, key="k_ctx")
+    st.text_input("Model", "gemini-2.0-flash", key="model_name")
+    st.checkbox("Show risk / guardrail meta", value=True, key="show_meta")
+
+with st.sidebar.expander("Crisis resources"):
+    st.caption(safety_preamble(st.session_state["country_code"]))
+
+country_code = st.session_state["country_code"]
+k_ctx = st.session_state["k_ctx"]
+model_name = st.session_state["model_name"]
+show_meta = st.session_state["show_meta"]
+
+MAX_TURNS = 6
+SUMMARY_MAX_CHARS = 400
+
+
+# ------- session persistence -------
+# Snapshots exist to survive a reload/restart, not to archive transcripts
+# in the tempdir: anything older than this is swept on session start.
+SNAPSHOT_TTL_S = 3600
+
+
+def _session_id() -> str:
+    """Stable session id, carried in the URL.
+
+    session_state (and a sid stored in it) dies with the tab/server —
+    exactly the situations restore is meant to survive — so the sid lives
+    in st.query_params: a reload or server restart keeps the URL and
+    therefore finds its snapshot again.
+    """
+    sid = st.session_state.get("sid")
+    if sid is None:
+        sid = st.query_params.get("sid", "")
+        # The sid lands in a file name; accept only our own uuid4 format.
+        if not (len(sid) == 32 and all(c in "0123456789abcdef" for c in sid)):
+            sid = uuid.uuid4().hex
+        st.query_params["sid"] = sid
+        st.session_state["sid"] = sid
+    return sid
+
+
+def _session_file() -> Path:
+    suffix = "mpk" if msgpack else "json"
+    return Path(tempfile.gettempdir()) / f"consultx_{_session_id()}.{suffix}"
+
+
+def _sweep_stale_snapshots() -> None:
+    """Delete expired snapshots so transcripts don't accumulate in /tmp."""
+    cutoff = time.time() - SNAPSHOT_TTL_S
+    for pattern in ("consultx_*.mpk", "consultx_*.json"):
+        for path in Path(tempfile.gettempdir()).glob(pattern):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:  # raced with another session's sweep
+                pass
+
+
+def persist_messages() -> None:
+    """Snapshot the transcript so a server restart doesn't lose the session."""
+    rows = [list(m) for m in st.session_state["messages"]]
+    path = _session_file()
+    if msgpack:
+        path.write_bytes(msgpack.packb(rows))
+    else:
+        path.write_text(json.dumps(rows), encoding="utf-8")
+
+
+def restore_messages() -> list:
+    path = _session_file()
+    if not path.exists():
+        return []
+    try:
+        if msgpack:
+            rows = msgpack.unpackb(path.read_bytes(), raw=False)
+        else:
+            rows = json.loads(path.read_text(encoding="utf-8"))
+        return [Msg(*row) for row in rows]
+    except Exception:
+        return []  # corrupt/stale snapshot; start fresh
+
+
+if "messages" not in st.session_state:
+    _sweep_stale_snapshots()
+    st.session_state["messages"] = restore_messages()
+
+# Incrementally maintained history views: O(1) per new message instead of
+# re-scanning the full message list on every rerun.
+if "transcript_deque" not in st.session_state:
+    st.session_state["transcript_deque"] = collections.deque(
+        build_transcript_block(st.session_state["messages"], MAX_TURNS).splitlines(),
+        maxlen=MAX_TURNS * 2,
+    )
+if "summary_buf" not in st.session_state:
+    st.session_state["summary_buf"] = build_history_summary(
+        st.session_state["messages"], SUMMARY_MAX_CHARS
+    )
+
+
+def remember_message(role: str, content: str, meta=None) -> None:
+    """Append a message and keep the cached transcript/summary views in sync."""
+    st.session_state["messages"].append(Msg(role, content, meta))
+    text = (content or "").strip()
+    if not text:
+        return
+    prefix = ROLE_PREFIX.get(role, "Therapist")
+    st.session_state["transcript_deque"].append(f"{prefix}: {text}")
+    if role == "user":
+        summary = st.session_state["summary_buf"]
+        if not summary:
+            summary = "Key concerns so far: " + text
+        else:
+            summary = summary + " | " + text
+        st.session_state["summary_buf"] = summary[-SUMMARY_MAX_CHARS:]
+    persist_messages()
+
+# ------- render history -------
+RENDER_WINDOW = 20  # rerun latency stays O(window), not O(session)
+
+
+def render_message(msg: Msg) -> None:
+    with st.chat_message(msg.role):
+        st.markdown(msg.content)
+        if show_meta and msg.meta:
+            with st.expander("Meta"):
+                # meta is serialized once at append time; st.code caches by
+                # content hash instead of re-serializing every rerun.
+                st.code(msg.meta, language="json")
+
+
+earlier = st.session_state["messages"][:-RENDER_WINDOW]
+if earlier:
+    # Streamlit only hydrates expander contents when opened, so long
+    # sessions don't pay markdown/DOM cost for old turns on every rerun.
+    with st.expander(f"Show earlier messages ({len(earlier)})"):
+        for msg in earlier:
+            render_message(msg)
+
+for msg in st.session_state["messages"][-RENDER_WINDOW:]:
+    render_message(msg)
+
+# ------- chat turn -------
+user_input = st.chat_input("What's on your mind?")
+if user_input:
+    user_input = user_input.strip()
+    if not user_input:
+        st.stop()
+
+    # Repeat-submit guard (double Enter, network hiccup): skip the LLM
+    # round-trip and surface the previous reply instead.
+    last_user = next(
+        (m for m in reversed(st.session_state["messages"]) if m.role == "user"), None
+    )
+    if last_user and last_user.content == user_input:
+        st.info("Duplicate message — showing the previous reply.")
+        last_reply = next(
+            (m for m in reversed(st.session_state["messages"]) if m.role == "assistant"),
+            None,
+        )
+        if last_reply:
+            render_message(last_reply)
+        st.stop()
+
+    remember_message("user", user_input)
+    with st.chat_message("user"):
+        st.markdown(user_input)
+
+    # Orchestrator import (router fit, encoder load, Chroma open) is deferred
+    # to this point so the first paint of the page stays sub-second; the
+    # cache_resource wrapper makes every call after the first free.
+    orch = get_orchestrator()
+
+    out = {}
+    try:
+        with st.chat_message("assistant"):
+            streamed = st.write_stream(
+                stream_off_thread(
+                    lambda: orch.stream_generate_reply(
+                        user_text=user_input,
+                        k=k_ctx,
+                        model=model_name,
+                        country_code=country_code,
+                        transcript_block=build_prompt_buf(
+                            st.session_state["summary_buf"],
+                            st.session_state["transcript_deque"],
+                        ),
+                        meta=out,
+                    )
+                )
+            )
+            # Guardrails run on the assembled reply after streaming; keep the
+            # safe version in history (and show it if it differs).
+            reply_text = out.get("reply") or streamed
+            meta = json.dumps(
+                {
+                    "risk": out.get("risk"),
+                    "guardrail_action": out.get("guardrail_action"),
+                    "guardrail_notes": out.get("guardrail_notes"),
+                    "docs": out.get("docs"),
+                },
+                ensure_ascii=False,
+                indent=2,
+                default=str,
+            )
+            if reply_text != streamed:
+                st.markdown(reply_text)
+            if show_meta and meta:
+                with st.expander("Meta"):
+                    st.code(meta, language="json")
+    except Exception as exc:
+        reply_text = f"Sorry, something went wrong: {exc}"
+        meta = None
+        st.error(reply_text)
+
+    remember_message("assistant", reply_text, meta)
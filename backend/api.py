@@ -2,11 +2,17 @@ from __future__ import annotations
 
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-from typing import Tuple
+from typing import Optional, Tuple
 from urllib.parse import parse_qs, urlparse
 
+try:  # Optional: C-accelerated JSON encoding for response bodies.
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    orjson = None
+
 from .auth import APIKeyAuthenticator, AuthenticationError
 from .models import SenderRole, SessionStatus
 from .session_tracking import (
@@ -17,6 +23,15 @@ from .session_tracking import (
 from .storage import SessionStorage
 
 
+if orjson is not None:
+    def _dumps(payload) -> bytes:
+        # orjson emits bytes directly; no separate str -> utf-8 pass.
+        return orjson.dumps(payload, default=str)
+else:
+    def _dumps(payload) -> bytes:
+        return json.dumps(payload, default=str).encode("utf-8")
+
+
 def _get_authenticator() -> APIKeyAuthenticator:
     try:
         return APIKeyAuthenticator.from_env()
@@ -43,72 +58,33 @@ class SessionRequestHandler(BaseHTTPRequestHandler):
     # --- HTTP METHOD HANDLERS -------------------------------------------------
 
     def do_POST(self) -> None:  # noqa: D401 - inherited docstring not required.
-        path, segments = self._path_parts()
-
-        if not self._ensure_authenticated():
-            return
-
-        if path == "/sessions" and len(segments) == 1:
-            self._create_session()
-            return
-
-        if path == "/mood-entries" and len(segments) == 1:
-            self._add_mood_entry()
-            return
-
-        if path == "/signup" and len(segments) == 1:
-            self._signup_user()
-            return
-
-        if path == "/login" and len(segments) == 1:
-            self._login_user()
-            return
-
-        if len(segments) >= 3 and segments[0] == "sessions":
-            session_id = segments[1]
-            if len(segments) == 3 and segments[2] == "messages":
-                self._append_message(session_id)
-                return
-            if len(segments) == 3 and segments[2] == "end":
-                self._end_session(session_id)
-                return
-
-        self._send_error(HTTPStatus.NOT_FOUND, "Endpoint not found.")
+        self._dispatch("POST")
 
     def do_GET(self) -> None:  # noqa: D401
-        path, segments = self._path_parts()
+        self._dispatch("GET")
 
-        if not self._ensure_authenticated():
-            return
+    def _dispatch(self, method: str) -> None:
+        """Route a request via the precomputed table in _ROUTES.
 
-        if path == "/sessions" and len(segments) == 1:
-            self._list_sessions()
-            return
-
-        if len(segments) >= 2 and segments[0] == "sessions":
-            session_id = segments[1]
-            if len(segments) == 2:
-                self._retrieve_session(session_id)
-                return
-            if len(segments) == 3 and segments[2] == "summary":
-                self._get_summary(session_id)
-                return
-
-        if path == "/weather" and len(segments) == 1:
-            self._get_weather()
+        The path is parsed into segments once; dynamic segments ('*' in the
+        route key, always the second segment here) are passed to the handler
+        as positional arguments.
+        """
+        if not self._ensure_authenticated():
             return
 
-        if path == "/mood-entries" and len(segments) == 1:
-            self._get_mood_entries()
+        _, segments = self._path_parts()
+        handler = self._ROUTES.get((method, tuple(segments)))
+        params: Tuple[str, ...] = ()
+        if handler is None and len(segments) >= 2:
+            masked = (segments[0], "*") + tuple(segments[2:])
+            handler = self._ROUTES.get((method, masked))
+            if handler is not None:
+                params = (segments[1],)
+        if handler is None:
+            self._send_error(HTTPStatus.NOT_FOUND, "Endpoint not found.")
             return
-
-        if len(segments) >= 2 and segments[0] == "user":
-            user_id = segments[1]
-            if len(segments) == 2:
-                self._get_user(user_id)
-                return
-
-        self._send_error(HTTPStatus.NOT_FOUND, "Endpoint not found.")
+        handler(self, *params)
 
     def do_OPTIONS(self) -> None:  # noqa: D401
         """Handle CORS preflight requests."""
@@ -245,23 +221,15 @@ class SessionRequestHandler(BaseHTTPRequestHandler):
             self._send_error(HTTPStatus.BAD_REQUEST, "'name' and 'password' are required.")
             return
         try:
-            with open("responses.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception:
-            data = {}
-        if username in data:
-            self._send_error(HTTPStatus.CONFLICT, "Username already exists.")
-            return
-        data[username] = {"password": password, "mood_entries": []}
-        try: 
-            with open("responses.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+            created = TRACKER.storage.create_user(username, password)
         except Exception as e:
             self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Failed to write user: {e}")
             return
+        if not created:
+            self._send_error(HTTPStatus.CONFLICT, "Username already exists.")
+            return
         self._send_json({"success": True, "user": username})
-        
-    
+
     def _login_user(self) -> None:
         payload = self._read_json()
         username = payload.get("name")
@@ -270,12 +238,10 @@ class SessionRequestHandler(BaseHTTPRequestHandler):
             self._send_error(HTTPStatus.BAD_REQUEST, "'name' and 'password' are required.")
             return
         try:
-            with open("responses.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
+            user = TRACKER.storage.get_user(username)
         except Exception:
             self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, "Could not read user data.")
             return
-        user = data.get(username)
         if not user or user.get("password") != password:
             self._send_error(HTTPStatus.UNAUTHORIZED, "Invalid username or password.")
             return
@@ -312,15 +278,9 @@ class SessionRequestHandler(BaseHTTPRequestHandler):
             self._send_error(HTTPStatus.BAD_REQUEST, "'user_id' query parameter is required.")
             return
 
-        # load mood entries from storage - for now, return mock data from json file
-        with open("responses.json", "r") as f:
-            data = json.load(f)
-            if user_id not in data:
-                data[user_id] = {"mood_entries": []}
-            mock_mood_entries = data[user_id]["mood_entries"]
-            # mock_mood_entries = json.load(f)[user_id]["mood_entries"]
-        self._send_json({"mood_entries": mock_mood_entries, "user_id": user_id})
-        
+        entries = TRACKER.storage.list_mood_entries(user_id)
+        self._send_json({"mood_entries": entries, "user_id": user_id})
+
     def _add_mood_entry(self) -> None:
         payload = self._read_json()
         user_id = payload.get("user_id")
@@ -329,20 +289,8 @@ class SessionRequestHandler(BaseHTTPRequestHandler):
         if not user_id or not date or not mood:
             self._send_error(HTTPStatus.BAD_REQUEST, "'user_id', 'date', and 'mood' are required.")
             return
-        
-        # Store the mood entry - for now, add it mock data file
-        with open("responses.json", "r+") as f:
-            data = json.load(f)
-            if user_id not in data:
-                data[user_id] = {"mood_entries": []}
-            data[user_id]["mood_entries"].append({
-                "date": date,
-                "mood": mood
-            })
-            f.seek(0)
-            json.dump(data, f, indent=4)
-            f.truncate()
-        entry = {"user_id": user_id, "date": date, "mood": mood}
+
+        entry = TRACKER.storage.add_mood_entry(user_id, date, mood)
         self._send_json({"entry": entry}, status=HTTPStatus.CREATED)
 
     # --- Utility helpers -----------------------------------------------------
@@ -361,7 +309,7 @@ class SessionRequestHandler(BaseHTTPRequestHandler):
             return None
 
     def _send_json(self, payload, status: HTTPStatus = HTTPStatus.OK) -> None:
-        body = json.dumps(payload).encode("utf-8")
+        body = _dumps(payload)
         self.send_response(status)
         self._send_cors_headers()
         self.send_header("Content-Type", "application/json")
@@ -371,7 +319,7 @@ class SessionRequestHandler(BaseHTTPRequestHandler):
 
     def _send_error(self, status: HTTPStatus, message: str, *, extra_headers: list[tuple[str, str]] | None = None) -> None:
         payload = {"error": message, "status": status.value}
-        body = json.dumps(payload).encode("utf-8")
+        body = _dumps(payload)
         self.send_response(status)
         self._send_cors_headers()
         self.send_header("Content-Type", "application/json")
@@ -410,10 +358,50 @@ class SessionRequestHandler(BaseHTTPRequestHandler):
         # Suppress default logging to keep CLI output tidy.
         return
 
+    # Built after the handlers above so the table can reference them directly.
+    _ROUTES = {
+        ("POST", ("sessions",)): _create_session,
+        ("POST", ("mood-entries",)): _add_mood_entry,
+        ("POST", ("signup",)): _signup_user,
+        ("POST", ("login",)): _login_user,
+        ("POST", ("sessions", "*", "messages")): _append_message,
+        ("POST", ("sessions", "*", "end")): _end_session,
+        ("GET", ("sessions",)): _list_sessions,
+        ("GET", ("sessions", "*")): _retrieve_session,
+        ("GET", ("sessions", "*", "summary")): _get_summary,
+        ("GET", ("weather",)): _get_weather,
+        ("GET", ("mood-entries",)): _get_mood_entries,
+        ("GET", ("user", "*")): _get_user,
+    }
+
+
+class PooledHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer that serves connections from a fixed worker pool.
+
+    The stock mixin spawns (and tears down) one thread per connection, which
+    thrashes under burst load. Reusing a bounded ThreadPoolExecutor keeps
+    thread creation off the per-request path and caps concurrency at a
+    multiple of the CPU count.
+    """
+
+    def __init__(self, server_address, handler_class, max_workers: Optional[int] = None) -> None:
+        super().__init__(server_address, handler_class)
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or (os.cpu_count() or 1) * 4,
+            thread_name_prefix="consultx-http",
+        )
+
+    def process_request(self, request, client_address) -> None:
+        self._pool.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._pool.shutdown(wait=False)
+
 
 def run(host: str = "127.0.0.1", port: int = 8000) -> None:
     """Start the HTTP server."""
-    server = ThreadingHTTPServer((host, port), SessionRequestHandler)
+    server = PooledHTTPServer((host, port), SessionRequestHandler)
     print(f"ConsultX session server running at http://{host}:{port}")
     try:
         server.serve_forever()
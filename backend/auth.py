@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import functools
 import os
 from dataclasses import dataclass
-from typing import Iterable, Optional, Sequence, Set
+from typing import FrozenSet, Optional, Set
 
 
 class AuthenticationError(Exception):
@@ -26,23 +27,29 @@ def _load_keys_from_file(path: str) -> Set[str]:
 class APIKeyAuthenticator:
     """Simple API-key based authentication helper for the HTTP server."""
 
-    keys: Set[str]
+    keys: FrozenSet[str]
 
     @classmethod
     def from_env(cls) -> "APIKeyAuthenticator":
-        """Construct an authenticator from environment settings."""
-        env_keys = {
-            key.strip()
-            for key in os.environ.get("CONSULTX_API_KEYS", "").split(",")
-            if key.strip()
-        }
-
-        file_path = os.environ.get("CONSULTX_API_KEYS_FILE")
-        if file_path:
-            file_keys = _load_keys_from_file(file_path)
-            env_keys.update(file_keys)
+        """Construct an authenticator from environment settings.
+
+        Instances are cached per (inline keys, key file) snapshot, so
+        repeated calls with an unchanged environment skip re-parsing and
+        file I/O; a key-file edit needs the env vars to change (or a new
+        process) to be picked up.
+        """
+        return cls._from_snapshot(
+            os.environ.get("CONSULTX_API_KEYS", ""),
+            os.environ.get("CONSULTX_API_KEYS_FILE"),
+        )
 
-        return cls(keys=env_keys)
+    @classmethod
+    @functools.lru_cache(maxsize=4)
+    def _from_snapshot(cls, inline: str, file_path: Optional[str]) -> "APIKeyAuthenticator":
+        env_keys = {key.strip() for key in inline.split(",") if key.strip()}
+        if file_path:
+            env_keys.update(_load_keys_from_file(file_path))
+        return cls(keys=frozenset(env_keys))
 
     def is_enabled(self) -> bool:
         return bool(self.keys)
@@ -63,9 +70,12 @@ class APIKeyAuthenticator:
             return None
         auth_header = headers.get("Authorization")
         if auth_header:
-            parts = auth_header.split(" ", 1)
-            if len(parts) == 2 and parts[0].lower() in {"bearer", "token"}:
-                return parts[1].strip()
+            # Prefix slices instead of split(): no per-request list or
+            # scheme-set allocation on the hot path.
+            if auth_header[:7].lower() == "bearer ":
+                return auth_header[7:].strip()
+            if auth_header[:6].lower() == "token ":
+                return auth_header[6:].strip()
         api_key = headers.get("X-API-Key")
         if api_key:
             return api_key.strip()
@@ -0,0 +1 @@
+"""Response caches sitting in front of the RAG pipeline."""
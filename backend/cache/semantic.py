@@ -0,0 +1,90 @@
+# backend/cache/semantic.py
+"""Random-projection LSH cache for near-duplicate therapy turns.
+
+Retries, reconnections and lightly rephrased messages are common in the
+UI; a hit here skips the whole retrieval + generation round-trip for a
+sub-millisecond lookup.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Near-duplicate lookup over embedding vectors.
+
+    Each vector is hashed by the sign pattern of `n_bits` random Gaussian
+    projections, independently in `n_tables` tables; a query probes one
+    bucket per table and scans only those candidates for cosine
+    similarity. Entries are bounded by an LRU so memory stays capped.
+    """
+
+    def __init__(self, dim: int, n_tables: int = 8, n_bits: int = 12,
+                 max_items: int = 512, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((n_tables, n_bits, dim)).astype(np.float32)
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(n_tables)]
+        # id -> (unit vector, value, bucket keys); insertion order is LRU order
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, Any, List[int]]]" = OrderedDict()
+        self._next_id = 0
+        self.max_items = max_items
+
+    @staticmethod
+    def _unit(vec) -> np.ndarray:
+        v = np.asarray(vec, dtype=np.float32)
+        n = float(np.linalg.norm(v))
+        return v / n if n else v
+
+    def _keys(self, unit: np.ndarray) -> List[int]:
+        signs = (self._planes @ unit) > 0  # (n_tables, n_bits)
+        keys = []
+        for row in signs:
+            k = 0
+            for b in row:
+                k = (k << 1) | int(b)
+            keys.append(k)
+        return keys
+
+    def get(self, vec, thr: float = 0.97) -> Optional[Any]:
+        """Best cached value with cosine >= thr, else None."""
+        unit = self._unit(vec)
+        best = None
+        best_sim = thr
+        best_id = None
+        seen = set()
+        for table, key in zip(self._tables, self._keys(unit)):
+            for eid in table.get(key, ()):
+                if eid in seen:
+                    continue
+                seen.add(eid)
+                cached_unit, value, _ = self._entries[eid]
+                sim = float(cached_unit @ unit)
+                if sim >= best_sim:
+                    best_sim = sim
+                    best = value
+                    best_id = eid
+        if best_id is not None:
+            self._entries.move_to_end(best_id)
+        return best
+
+    def set(self, vec, value: Any) -> None:
+        unit = self._unit(vec)
+        keys = self._keys(unit)
+        eid = self._next_id
+        self._next_id += 1
+        self._entries[eid] = (unit, value, keys)
+        for table, key in zip(self._tables, keys):
+            table.setdefault(key, []).append(eid)
+        while len(self._entries) > self.max_items:
+            old_id, (_, _, old_keys) = self._entries.popitem(last=False)
+            for table, key in zip(self._tables, old_keys):
+                bucket = table.get(key)
+                if bucket is not None:
+                    try:
+                        bucket.remove(old_id)
+                    except ValueError:
+                        pass
+                    if not bucket:
+                        del table[key]
@@ -0,0 +1,79 @@
+# backend/core/batching.py
+"""Shared micro-batching primitive for request coalescing.
+
+Both the LLM gateway path (orchestrator) and the emotion classifier
+(risk_types) fuse concurrent calls into short-window batches on a drain
+thread; this module holds the one queue/worker implementation they share.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, List, Optional, Tuple
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent calls into batches serviced by a drain thread.
+
+    Callers block on a Future while the drain thread collects payloads
+    arriving within a short window and hands them to ``_dispatch`` as one
+    batch. The worker exits when idle and is restarted by the next call.
+
+    Subclasses implement ``_dispatch(batch)``, where batch is a list of
+    ``(payload, Future)`` pairs; the dispatcher must resolve every future.
+    """
+
+    def __init__(self, max_batch: int, window_s: float):
+        self.max_batch = max_batch
+        self.window_s = window_s
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def call(self, payload) -> Any:
+        """Enqueue one payload and block until its batch resolves it."""
+        fut: Future = Future()
+        self._queue.put((payload, fut))
+        self._ensure_worker()
+        return fut.result()
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._drain, daemon=True)
+                self._worker.start()
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                batch: List[Tuple[Any, Future]] = [self._queue.get(timeout=1.0)]
+            except queue.Empty:
+                # Idle exit must not orphan a request. A call() can enqueue
+                # between the timeout above and this thread dying, see a
+                # still-alive worker in _ensure_worker, and skip the
+                # restart — leaving its future unresolved forever. So the
+                # worker only retires under the same lock that guards
+                # restarts, after re-checking the queue: either the racing
+                # payload is already visible here (keep draining), or the
+                # racing call() finds self._worker dead/None and starts a
+                # fresh worker. put() always precedes the caller's lock
+                # acquisition, so no enqueue can slip past both checks.
+                with self._lock:
+                    if self._queue.empty():
+                        self._worker = None
+                        return
+                continue
+            deadline = time.monotonic() + self.window_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[Tuple[Any, Future]]) -> None:
+        raise NotImplementedError
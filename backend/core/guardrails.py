@@ -16,6 +16,7 @@ from __future__ import annotations
 
 import random
 import re
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
 
@@ -29,12 +30,15 @@ _BAD_PHRASES = [
     "you are naming how tough this is",
 ]
 
+# Compiled once at import: a single alternation scan instead of one
+# re.sub (and implicit pattern compile) per phrase per reply.
+_BAD_PHRASES_RX = re.compile("|".join(re.escape(p) for p in _BAD_PHRASES), re.I)
+_RX_EXTRA_SPACE = re.compile(r"\s{2,}")
+
 
 def _strip_bad_phrases(text: str) -> str:
-    t = text or ""
-    for p in _BAD_PHRASES:
-        t = re.sub(re.escape(p), "", t, flags=re.I)
-    return re.sub(r"\s{2,}", " ", t).strip()
+    t = _BAD_PHRASES_RX.sub("", text or "")
+    return _RX_EXTRA_SPACE.sub(" ", t).strip()
 
 
 # -----------------------------
@@ -87,6 +91,7 @@ HOTLINES = {
 }
 
 
+@lru_cache(maxsize=32)
 def _hotline_block(country_code: Optional[str]) -> str:
     cc = (country_code or "").upper()
     info = HOTLINES.get(cc)
@@ -101,6 +106,7 @@ def _hotline_block(country_code: Optional[str]) -> str:
     )
 
 
+@lru_cache(maxsize=32)
 def _crisis_script(country_code: Optional[str]) -> str:
     """
     Softer, Therabot-style crisis response:
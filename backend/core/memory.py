@@ -1,4 +1,6 @@
 # backend/core/memory.py
+from collections import deque
+from itertools import islice
 from typing import Dict, List, Tuple
 from .schemas import SessionState, ChatMessage
 
@@ -10,18 +12,21 @@ class SessionMemory:
 
     def get_or_create(self, session_id:str) -> SessionState:
         if session_id not in self._sessions:
-            self._sessions[session_id] = SessionState(session_id=session_id)
+            # bounded deque: appends auto-evict in O(1), no periodic trim/
+            # reallocation like the old list slicing
+            self._sessions[session_id] = SessionState(
+                session_id=session_id,
+                messages=deque(maxlen=self.max_window * 2 + 20),
+            )
         return self._sessions[session_id]
 
     def add_user(self, session_id:str, text:str):
         s = self.get_or_create(session_id)
-        s.messages.append(ChatMessage(role="user", content=text))
-        self._trim(s)
+        s.messages.append(ChatMessage(role="user", content=text, rendered=f"User: {text}"))
 
     def add_assistant(self, session_id:str, text:str):
         s = self.get_or_create(session_id)
-        s.messages.append(ChatMessage(role="assistant", content=text))
-        self._trim(s)
+        s.messages.append(ChatMessage(role="assistant", content=text, rendered=f"Therapist: {text}"))
 
     def set_summary(self, session_id:str, summary:str):
         s = self.get_or_create(session_id)
@@ -33,23 +38,19 @@ class SessionMemory:
 
     def window(self, session_id:str) -> List[ChatMessage]:
         s = self.get_or_create(session_id)
-        # return the last N messages (user+assistant)
-        return s.messages[-self.max_window:]
+        # return the last N messages (user+assistant); deques don't slice,
+        # islice avoids copying the whole buffer first
+        start = max(0, len(s.messages) - self.max_window)
+        return list(islice(s.messages, start, None))
 
     def get_context_blocks(self, session_id:str) -> Tuple[str, str]:
         """Return (summary_block, transcript_block) strings for prompts."""
         s = self.get_or_create(session_id)
         summary_block = f"Session summary so far: {s.summary}" if s.summary else ""
-        # compact last turns
-        turns = []
-        for m in self.window(session_id):
-            prefix = "User" if m.role == "user" else "Therapist"
-            turns.append(f"{prefix}: {m.content}")
-        transcript_block = "\n".join(turns)
+        # compact last turns: lines were rendered at append time, so the
+        # read path is just a join (fallback covers ad-hoc messages)
+        transcript_block = "\n".join(
+            m.rendered or f"{'User' if m.role == 'user' else 'Therapist'}: {m.content}"
+            for m in self.window(session_id)
+        )
         return summary_block, transcript_block
-
-    def _trim(self, s: SessionState):
-        # keep memory small
-        if len(s.messages) > (self.max_window * 2 + 20):
-            # drop older half (assistant-safe)
-            s.messages = s.messages[-(self.max_window * 2):]
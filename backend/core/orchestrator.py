@@ -4,11 +4,14 @@ End-to-end orchestration with optional conversation memory.
 user_text -> risk_types -> retrieval -> prompt -> Gemini -> guardrails
 """
 from typing import Dict, Any, Optional, List, Tuple
-import importlib
-from collections import deque
+import hashlib
+from collections import OrderedDict
+from types import MappingProxyType
+from concurrent.futures import Future, ThreadPoolExecutor
 
+from .batching import MicroBatcher
 from .prompt import build_prompt
-from .llm_gateway import make_gemini
+from .llm_gateway import make_gemini, make_gemini_stream
 from .retrieval import retrieve_context
 import backend.core.guardrails as guardrails
 from backend.core.session_store import store as session_store
@@ -17,56 +20,60 @@ _router = default_router()
 
 
 
-# ------- simple in-memory session store -------
-_SESSIONS: Dict[str, Dict[str, Any]] = {}  # { session_id: {"summary": str, "turns": deque([(u,r), ...], maxlen)} }
+# ------- LLM request coalescing -------
+_BATCH_WINDOW_S = 0.02
+_MAX_BATCH = 8
 
-def _session_get(session_id: str, max_turns: int = 6) -> Tuple[str, str]:
+
+class _LLMBatcher(MicroBatcher):
     """
-    Returns (summary, transcript_block) for prompt conditioning.
-    transcript_block is "User:/Therapist:" lines for the last few turns.
+    Coalesce LLM calls from concurrent sessions.
+
+    Callers block on a Future while a single drain thread collects requests
+    arriving within a short window and dispatches them together through a
+    shared thread pool, so N concurrent chat turns overlap their network /
+    inference latency instead of serializing behind one another.
     """
-    if not session_id or session_id not in _SESSIONS:
-        return "", ""
-    s = _SESSIONS[session_id]
-    summary = s.get("summary", "")
-    turns: deque = s.get("turns", deque(maxlen=max_turns))
-    lines = []
-    for u, r in list(turns)[-max_turns:]:
-        if u: lines.append(f"User: {u}")
-        if r: lines.append(f"Therapist: {r}")
-    return summary, "\n".join(lines)
-
-def _session_update(session_id: str, user_text: str, reply_text: str, max_turns: int = 6) -> None:
-    if not session_id: return
-    if session_id not in _SESSIONS:
-        _SESSIONS[session_id] = {"summary": "", "turns": deque(maxlen=max_turns)}
-    s = _SESSIONS[session_id]
-    s["turns"].append((user_text, reply_text))
-    # naive rolling summary (short & safe)
-    if not s["summary"]:
-        s["summary"] = f"Conversation started. Key themes emerging."
-    if len(s["turns"]) >= 2:
-        # keep this lightweight to avoid latency
-        last_u, _ = s["turns"][-1]
-        s["summary"] = (s["summary"][:300] + f" Latest concern: {last_u[:200]}").strip()[:500]
 
-# ------- risk module loader -------
-_RISK_MODULE_NAME = "backend.core.risk_types"
+    def __init__(self, max_batch: int = _MAX_BATCH, window_s: float = _BATCH_WINDOW_S):
+        super().__init__(max_batch=max_batch, window_s=window_s)
+        self._pool = ThreadPoolExecutor(max_workers=max_batch)
 
-def _load_risk_module():
-    try:
-        return importlib.import_module(_RISK_MODULE_NAME)
-    except Exception:
-        return importlib.import_module("risk_types")
+    def submit(self, llm_call, prompt: str) -> str:
+        return self.call((llm_call, prompt))
+
+    def _dispatch(self, batch) -> None:
+        for (llm_call, prompt), fut in batch:
+            self._pool.submit(self._run_one, llm_call, prompt, fut)
+
+    @staticmethod
+    def _run_one(llm_call, prompt: str, fut: Future) -> None:
+        try:
+            fut.set_result(llm_call(prompt))
+        except Exception as exc:  # surfaced to the waiting caller
+            fut.set_exception(exc)
 
-def _call_risk_fn(mod, user_text: str) -> Dict[str, Any]:
+
+_llm_batcher = _LLMBatcher()
+
+
+# ------- risk module loader -------
+try:
+    from . import risk_types as _RISK_MOD
+except ImportError:
+    import risk_types as _RISK_MOD
+
+def _resolve_risk_fn(mod):
     for name in ("assess", "analyze", "analyze_text", "evaluate", "predict", "classify", "run"):
-        if hasattr(mod, name):
-            out = getattr(mod, name)(user_text)
-            if isinstance(out, dict):
-                return out
+        fn = getattr(mod, name, None)
+        if fn is not None:
+            return fn
     raise RuntimeError("risk_types should expose one of: assess/analyze/analyze_text/evaluate/predict/classify/run")
 
+# Resolved once at import: the per-request candidate-name scan was pure
+# overhead after the first call.
+_RISK_FN = _resolve_risk_fn(_RISK_MOD)
+
 def _normalize_risk(raw: Dict[str, Any]) -> Dict[str, Any]:
     dims = raw.get("dimensions") or raw.get("dimension") or []
     if isinstance(dims, str): dims = [dims]
@@ -78,24 +85,100 @@ def _normalize_risk(raw: Dict[str, Any]) -> Dict[str, Any]:
         "confidence": raw.get("confidence", 0.0),
     }
 
-# ------- public helpers -------
-def run_retrieval_only(user_text: str, k: Optional[int] = None) -> Dict[str, Any]:
-    risk_mod = _load_risk_module()
-    raw = _call_risk_fn(risk_mod, user_text)
-    risk = _normalize_risk(raw)
+# ------- provider-side context cache (prefix reuse across turns) -------
+# session_id -> (retrieved-doc hash, CachedContent handle). Consecutive
+# turns in a session usually retrieve the same docs, so the provider can
+# serve the prefilled context prefix instead of re-processing it.
+_CTX_CACHE: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+_CTX_CACHE_MAX = 64  # caps server-side cache storage cost
 
-    ctx, docs = retrieve_context(user_text, risk, k_override=k)
 
-    compact_docs: List[Dict[str, Any]] = []
+def _session_cached_content(session_id: Optional[str], docs, context_block: str, model: str):
+    """Best-effort CachedContent handle for this session's retrieved docs.
+
+    Returns None (and the caller inlines the context as before) whenever
+    the session is anonymous, the doc set changed since the handle was
+    created, or the SDK/model refuses the cache request — e.g. below the
+    provider's minimum cacheable token count. Refusals are memoized per
+    (session, doc_key) as a None handle, since a context that was too
+    small to cache stays too small: without the sentinel every turn of
+    the session would re-pay a doomed create() round-trip.
+    """
+    if not session_id or not docs:
+        return None
+    doc_key = hashlib.sha1(
+        "|".join(sorted((d.metadata or {}).get("id", "") for d in docs)).encode()
+    ).hexdigest()
+    hit = _CTX_CACHE.get(session_id)
+    if hit is not None and hit[0] == doc_key:
+        _CTX_CACHE.move_to_end(session_id)
+        return hit[1]
+    if hit is not None and hit[1] is not None:
+        # Doc set changed: the superseded handle would otherwise live on
+        # provider-side until its TTL; only LRU eviction used to delete it.
+        try:
+            hit[1].delete()
+        except Exception:
+            pass
+    try:
+        from google.generativeai import caching
+        handle = caching.CachedContent.create(model=model, contents=[context_block])
+    except Exception:
+        handle = None
+    _CTX_CACHE[session_id] = (doc_key, handle)
+    while len(_CTX_CACHE) > _CTX_CACHE_MAX:
+        _, (_, old) = _CTX_CACHE.popitem(last=False)
+        if old is not None:
+            try:
+                old.delete()
+            except Exception:
+                pass
+    return handle
+
+
+def _compact_docs(docs) -> List[Dict[str, Any]]:
+    """Compact retrieved docs for response payloads.
+
+    Slices the preview to 140 chars before replacing newlines, so the
+    replace touches at most 140 chars instead of the whole document
+    (newline -> space is length-preserving, so the output is identical).
+    """
+    out: List[Dict[str, Any]] = []
     for d in docs:
         meta = d.metadata or {}
-        compact_docs.append({
+        out.append({
             "id": meta.get("id", ""),
             "tags": meta.get("tags", ""),
-            "preview": (d.page_content or "").replace("\n", " ")[:140],
+            "preview": (d.page_content or "")[:140].replace("\n", " "),
         })
+    return out
+
+# Frozen prototypes for the constant-branch risk dicts. dict(_PROTO) is a
+# flat C-level copy, cheaper than re-evaluating the five-key literal per
+# request, and each caller still gets its own mutable dict. Dimensions are
+# tuples so the copies share nothing mutable.
+_PREROUTE_CRISIS_RISK = MappingProxyType(
+    {"tier": "crisis", "emotion": None, "dimensions": (), "score": 1, "confidence": 1.0})
+_PREROUTE_DENY_RISK = MappingProxyType(
+    {"tier": "OK", "emotion": None, "dimensions": (), "score": 0, "confidence": 0.9})
+_LEXICAL_CRISIS_RISK = MappingProxyType(
+    {"tier": "Crisis", "emotion": None, "dimensions": ("Suicidal ideation",),
+     "score": 3, "confidence": 1.0})
+
+
+# ------- public helpers -------
+def build_safety_preamble(country_code: str) -> str:
+    """Resolved country-specific crisis-resource text (cacheable by callers)."""
+    return guardrails._hotline_block((country_code or "").upper())
 
-    return {"risk": risk, "context": ctx, "docs": compact_docs}
+
+def run_retrieval_only(user_text: str, k: Optional[int] = None) -> Dict[str, Any]:
+    raw = _RISK_FN(user_text)
+    risk = _normalize_risk(raw)
+
+    ctx, docs = retrieve_context(user_text, risk, k_override=k)
+
+    return {"risk": risk, "context": ctx, "docs": _compact_docs(docs)}
 # backend/core/orchestrator.py
 
 
@@ -108,6 +191,7 @@ def run_generate_reply(
     transcript_block: Optional[str] = None,
     session_id: Optional[str] = None,
     use_guardrails: bool = True,   # ← new flag
+    cached_context: Any = None,    # explicit CachedContent handle override
 ) -> Dict[str, Any]:
     """
     Full pipeline with either explicit history (history_summary/transcript_block) or
@@ -132,7 +216,7 @@ def run_generate_reply(
     if route_label == "crisis":
         safe = guardrails.enforce(user_text, "", {"tier":"crisis"}, country_code=country_code)
         return {
-            "risk": {"tier":"crisis","emotion":None,"dimensions":[],"score":1,"confidence":1.0},
+            "risk": dict(_PREROUTE_CRISIS_RISK),
             "prompt": "",
             "reply_raw": "",
             "reply": safe["final"],
@@ -146,7 +230,7 @@ def run_generate_reply(
             "explore next steps you’d consider. If you’d like, we can focus on what this brings up for you.")
         safe = guardrails.enforce(user_text, msg, {"tier":"OK"}, country_code=country_code)
         return {
-            "risk": {"tier":"OK","emotion":None,"dimensions":[],"score":0,"confidence":0.9},
+            "risk": dict(_PREROUTE_DENY_RISK),
             "prompt": "",
             "reply_raw": msg,
             "reply": safe["final"],
@@ -155,16 +239,20 @@ def run_generate_reply(
             "docs": []
         }
 
-    # 1) risk
-    risk_mod = _load_risk_module()
-    raw = _call_risk_fn(risk_mod, user_text)
-    risk = _normalize_risk(raw)
+    # 1) risk — the lexical crisis check costs microseconds, so run it
+    # before the risk model and skip the model forward pass entirely when
+    # it already decides the turn
+    if guardrails._is_suicidal_text(user_text):
+        risk = dict(_LEXICAL_CRISIS_RISK)
+    else:
+        risk = _normalize_risk(_RISK_FN(user_text))
 
     # 1.5) crisis short-circuit
-    if guardrails._is_suicidal_text(user_text) or risk.get("tier","OK").lower() == "crisis":
+    if risk.get("tier","OK").lower() == "crisis":
         safe = guardrails.enforce(user_text, "", risk, country_code=country_code)
         # update session with the crisis reply so the next turn has context
-        _session_update(session_id, user_text, safe["final"]) if session_id else None
+        if session_id:
+            session_store.append_turn(session_id, user_text, safe["final"])
         return {
             "risk": risk, "prompt": "", "reply_raw": "",
             "reply": safe["final"],
@@ -178,31 +266,36 @@ def run_generate_reply(
     ctx, docs = retrieve_context(user_text, risk, k_override=k)
 
 
-    history_summary = session_store.get_summary(session_id) if session_id else ""
-    transcript_block = session_store.get_transcript_block(session_id, max_pairs=5) if session_id else ""
+    # one store lookup for everything the prompt + guardrails need
+    if session_id:
+        history_summary, transcript_block, prev = session_store.get_context(session_id, max_pairs=5)
+    else:
+        history_summary, transcript_block, prev = "", "", None
+
+    # 2.5) provider-side prefix cache: when the session's retrieved docs
+    # are already cached server-side, keep them out of the inline prompt
+    cc = cached_context if cached_context is not None else \
+        _session_cached_content(session_id, docs, ctx, model)
     prompt = build_prompt(
         user_text=user_text,
         risk=risk,
-        retrieved_snippets=ctx,
+        retrieved_snippets="" if cc is not None else ctx,
         history_summary=history_summary,
         transcript_block=transcript_block,
     )
 
 
     # 5) LLM
-    llm_call = make_gemini(model=model, temperature=0.2, max_output_tokens=450)
-    reply_raw = llm_call(prompt)
+    llm_call = make_gemini(model=model, temperature=0.2, max_output_tokens=450,
+                           cached_content=cc)
+    reply_raw = _llm_batcher.submit(llm_call, prompt)
 
     # post-route the model reply (safety belt)
     post_label, post_score = _router.route(reply_raw)
     if post_label.startswith("deny"):
         reply_raw = ("Therapist:\nI want to keep this space safe and supportive. I can’t provide guidance on that topic. "
                     "If you’d like, we can shift to how you’re feeling and pick one small step you’d consider.")
-    # 6) Guardrails (one call, from the module)
-    # safe = guardrails.enforce(user_text, reply_raw, risk, country_code=country_code, prev_reply=session_store.get_last_reply(session_id) if session_id else None)
-
-    prev = session_store.get_last_reply(session_id) if session_id else None
-
+    # 6) Guardrails (one call, from the module; prev came from get_context)
     if use_guardrails:
         safe = guardrails.enforce(
             user_text=user_text,
@@ -243,14 +336,7 @@ def run_generate_reply(
 
 
     # 8) compact docs
-    compact_docs: List[Dict[str, Any]] = []
-    for d in docs:
-        meta = d.metadata or {}
-        compact_docs.append({
-            "id": meta.get("id", ""),
-            "tags": meta.get("tags", ""),
-            "preview": (d.page_content or "").replace("\n"," ")[:140]
-        })
+    compact_docs = _compact_docs(docs)
 
     return {
         "risk": risk,
@@ -262,3 +348,149 @@ def run_generate_reply(
         "docs": compact_docs
     }
 
+
+def run_generate_reply_batch(
+    user_texts: List[str],
+    k: Optional[int] = None,
+    model: str = "gemini-2.0-flash",
+    country_code: str = "US",
+    use_guardrails: bool = True,
+) -> List[Dict[str, Any]]:
+    """Batch variant of run_generate_reply for offline eval runs.
+
+    The installed SDK exposes no inline batch_generate_content endpoint,
+    so this fans the turns out across a pool; their LLM calls coalesce in
+    the shared _llm_batcher, giving the aggregate-throughput effect of a
+    provider batch request without a second client stack. Results come
+    back in input order; a failed turn yields {"error": exc} so one bad
+    case cannot sink the batch.
+    """
+    if not user_texts:
+        return []
+    results: List[Dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=min(len(user_texts), _MAX_BATCH)) as pool:
+        futs = [
+            pool.submit(
+                run_generate_reply, t, k=k, model=model,
+                country_code=country_code, use_guardrails=use_guardrails,
+            )
+            for t in user_texts
+        ]
+        for fut in futs:
+            try:
+                results.append(fut.result())
+            except Exception as exc:
+                results.append({"error": exc})
+    return results
+
+
+def stream_generate_reply(
+    user_text: str,
+    k: Optional[int] = None,
+    model: str = "gemini-2.0-flash",
+    country_code: str = "US",
+    history_summary: Optional[str] = None,
+    transcript_block: Optional[str] = None,
+    session_id: Optional[str] = None,
+    use_guardrails: bool = True,
+    meta: Optional[Dict[str, Any]] = None,
+):
+    """
+    Streaming variant of run_generate_reply.
+
+    Yields text chunks as Gemini emits them so the UI can paint tokens
+    immediately instead of blocking on the full reply. Crisis / deny
+    pre-routes yield the scripted reply in one chunk. If the caller
+    passes a `meta` dict it is populated (risk, guardrail action/notes,
+    docs, final post-guardrail reply) once the stream is exhausted.
+    """
+    if meta is None:
+        meta = {}
+
+    # 0) pre-route (same as run_generate_reply)
+    route_label, _route_score = _router.route(user_text)
+    if route_label == "crisis":
+        out = run_generate_reply(
+            user_text, k=k, model=model, country_code=country_code,
+            session_id=session_id, use_guardrails=use_guardrails,
+        )
+        meta.update(out)
+        yield out["reply"]
+        return
+
+    # 1) risk + crisis short-circuit (lexical check first: it is cheap and
+    # lets us skip the risk model on the crisis path)
+    if guardrails._is_suicidal_text(user_text):
+        risk = dict(_LEXICAL_CRISIS_RISK)
+    else:
+        risk = _normalize_risk(_RISK_FN(user_text))
+    if route_label.startswith("deny") or risk.get("tier", "OK").lower() == "crisis":
+        out = run_generate_reply(
+            user_text, k=k, model=model, country_code=country_code,
+            session_id=session_id, use_guardrails=use_guardrails,
+        )
+        meta.update(out)
+        yield out["reply"]
+        return
+
+    # 2) retrieval + prompt
+    ctx, docs = retrieve_context(user_text, risk, k_override=k)
+    history_summary = history_summary if history_summary is not None else (
+        session_store.get_summary(session_id) if session_id else ""
+    )
+    transcript_block = transcript_block if transcript_block is not None else (
+        session_store.get_transcript_block(session_id, max_pairs=5) if session_id else ""
+    )
+    prompt = build_prompt(
+        user_text=user_text,
+        risk=risk,
+        retrieved_snippets=ctx,
+        history_summary=history_summary,
+        transcript_block=transcript_block,
+    )
+
+    # 3) stream the LLM reply, accumulating raw text for guardrails
+    llm_stream = make_gemini_stream(model=model, temperature=0.2, max_output_tokens=450)
+    pieces: List[str] = []
+    for chunk in llm_stream(prompt):
+        pieces.append(chunk)
+        yield chunk
+    reply_raw = "".join(pieces).strip()
+
+    # 3.5) post-route the assembled reply (same safety belt as
+    # run_generate_reply): guardrails.enforce does not cover the router's
+    # deny categories, so without this a reply drifting into denied
+    # territory would land unreplaced in meta["reply"] and the session
+    # store. The raw chunks have already streamed; callers surfacing the
+    # final text must render meta["reply"] once the stream is exhausted.
+    post_label, _post_score = _router.route(reply_raw)
+    if post_label.startswith("deny"):
+        reply_raw = ("Therapist:\nI want to keep this space safe and supportive. I can’t provide guidance on that topic. "
+                    "If you’d like, we can shift to how you’re feeling and pick one small step you’d consider.")
+
+    # 4) guardrails on the assembled reply (meta carries the safe version)
+    prev = session_store.get_last_reply(session_id) if session_id else None
+    if use_guardrails:
+        safe = guardrails.enforce(
+            user_text=user_text,
+            llm_reply=reply_raw,
+            risk=risk,
+            country_code=country_code,
+            prev_reply=prev,
+        )
+    else:
+        safe = {"final": reply_raw, "action": "bypass", "notes": "guardrails_disabled"}
+
+    if session_id:
+        session_store.append_turn(session_id, user_text, safe["final"])
+
+    meta.update({
+        "risk": risk,
+        "prompt": prompt,
+        "reply_raw": reply_raw,
+        "reply": safe["final"],
+        "guardrail_action": safe["action"],
+        "guardrail_notes": safe["notes"],
+        "docs": _compact_docs(docs),
+    })
+
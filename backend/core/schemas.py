@@ -37,11 +37,17 @@ class RAGResponse(BaseModel):
 class ChatMessage:
     role: str           # "user" | "assistant" | "system"
     content: str
+    # transcript line ("User: ..." / "Therapist: ...") rendered once at
+    # append time; messages are immutable after that, and prompts are
+    # built far more often than messages arrive
+    rendered: str = ""
     ts: float = field(default_factory=lambda: time.time())
 
 @dataclass
 class SessionState:
     session_id: str
+    # SessionMemory constructs this as a bounded deque; any sequence with
+    # append() works for ad-hoc use.
     messages: List[ChatMessage] = field(default_factory=list)
     summary: str = ""           # rolling summary (short)
     last_risk: Optional[Dict[str, Any]] = None
@@ -2,6 +2,7 @@
 from __future__ import annotations
 from typing import Dict, List, Tuple, Optional
 from collections import defaultdict, deque
+from itertools import islice
 
 # Simple in-memory store (per-process). Good enough for notebooks / dev.
 # Each session_id maps to:
@@ -51,6 +52,23 @@ class _SessionStore:
                 lines.append(f"Therapist: {b}")
         return "\n".join(lines)
 
+    def get_context(self, session_id: str, max_pairs: int = 5) -> Tuple[str, str, Optional[str]]:
+        """One-shot (summary, transcript_block, last_reply).
+
+        Fuses get_summary/get_transcript_block/get_last_reply so a prompt
+        build touches the session state once instead of three times."""
+        if not session_id or session_id not in self._turns:
+            return self._summary.get(session_id, ""), "", None
+        turns = self._turns[session_id]
+        lines: List[str] = []
+        for u, b in islice(turns, max(0, len(turns) - max_pairs), None):
+            if u:
+                lines.append(f"User: {u}")
+            if b:
+                lines.append(f"Therapist: {b}")
+        last_reply = (turns[-1][1] or None) if turns else None
+        return self._summary.get(session_id, ""), "\n".join(lines), last_reply
+
     # --- summary (very simple; you can plug in your own summarizer) ---
     def get_summary(self, session_id: str) -> str:
         return self._summary.get(session_id, "")
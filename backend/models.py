@@ -1,14 +1,37 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field, asdict
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
 from typing import Dict, List, Optional
 
+__all__ = [
+    "utc_now",
+    "RiskTier",
+    "SentimentBand",
+    "SessionStatus",
+    "SenderRole",
+    "MessageRecord",
+    "SessionRecord",
+    "SessionMetrics",
+    "SessionSummary",
+    "BufferSnapshot",
+    "RiskAssessment",
+    "SentimentResult",
+]
+
+_UTC = timezone.utc
+
 
 def utc_now() -> datetime:
-    """Return a timezone-aware UTC timestamp."""
-    return datetime.now(timezone.utc)
+    """Return a timezone-aware UTC timestamp.
+
+    Built from time.time_ns() rather than datetime.now(tz): the clock
+    read is a direct syscall, which matters when bursting messages
+    through the buffer (one record per message).
+    """
+    return datetime.fromtimestamp(time.time_ns() * 1e-9, _UTC)
 
 
 class RiskTier(str, Enum):
@@ -35,7 +58,9 @@ class SenderRole(str, Enum):
     SYSTEM = "system"
 
 
-@dataclass
+# slots=True throughout: these records are allocated per message/turn, and
+# dropping the per-instance __dict__ shrinks them and speeds attribute access.
+@dataclass(slots=True)
 class MessageRecord:
     session_id: str
     sender: SenderRole
@@ -46,16 +71,36 @@ class MessageRecord:
     flagged_keywords: List[str]
     created_at: datetime
     id: Optional[int] = None
+    # Memoized to_dict payload; records are serialized repeatedly per turn
+    # (buffer snapshot, API response) and any field write invalidates it.
+    _cached_dict: Optional[Dict[str, object]] = field(default=None, repr=False, compare=False)
 
-    def to_dict(self) -> Dict[str, object]:
-        data = asdict(self)
-        data["sender"] = self.sender.value
-        data["risk_tier"] = self.risk_tier.value
-        data["created_at"] = self.created_at.isoformat()
-        return data
-
+    def __setattr__(self, name: str, value: object) -> None:
+        # object.__setattr__ rather than super(): slots=True rebuilds the
+        # class, which breaks the zero-arg super() cell in methods.
+        if name != "_cached_dict":
+            object.__setattr__(self, "_cached_dict", None)
+        object.__setattr__(self, name, value)
 
-@dataclass
+    def to_dict(self) -> Dict[str, object]:
+        cached = self._cached_dict
+        if cached is None:
+            cached = {
+                "session_id": self.session_id,
+                "sender": self.sender.value,
+                "content": self.content,
+                "sentiment_score": self.sentiment_score,
+                "risk_tier": self.risk_tier.value,
+                "risk_score": self.risk_score,
+                "flagged_keywords": self.flagged_keywords,
+                "created_at": self.created_at.isoformat(),
+                "id": self.id,
+            }
+            self._cached_dict = cached
+        return cached
+
+
+@dataclass(slots=True)
 class SessionRecord:
     id: str
     user_id: str
@@ -64,21 +109,32 @@ class SessionRecord:
     updated_at: datetime
     active_risk_tier: RiskTier
     metadata: Dict[str, object] = field(default_factory=dict)
+    _cached_dict: Optional[Dict[str, object]] = field(default=None, repr=False, compare=False)
 
-    def to_dict(self) -> Dict[str, object]:
-        data = {
-            "id": self.id,
-            "user_id": self.user_id,
-            "status": self.status.value,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat(),
-            "active_risk_tier": self.active_risk_tier.value,
-            "metadata": self.metadata,
-        }
-        return data
+    def __setattr__(self, name: str, value: object) -> None:
+        # object.__setattr__ rather than super(): slots=True rebuilds the
+        # class, which breaks the zero-arg super() cell in methods.
+        if name != "_cached_dict":
+            object.__setattr__(self, "_cached_dict", None)
+        object.__setattr__(self, name, value)
 
-
-@dataclass
+    def to_dict(self) -> Dict[str, object]:
+        cached = self._cached_dict
+        if cached is None:
+            cached = {
+                "id": self.id,
+                "user_id": self.user_id,
+                "status": self.status.value,
+                "created_at": self.created_at.isoformat(),
+                "updated_at": self.updated_at.isoformat(),
+                "active_risk_tier": self.active_risk_tier.value,
+                "metadata": self.metadata,
+            }
+            self._cached_dict = cached
+        return cached
+
+
+@dataclass(slots=True)
 class SessionMetrics:
     session_id: str
     message_count: int
@@ -106,7 +162,7 @@ class SessionMetrics:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionSummary:
     session: SessionRecord
     metrics: SessionMetrics
@@ -124,7 +180,7 @@ class SessionSummary:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class BufferSnapshot:
     session_id: str
     messages: List[MessageRecord]
@@ -138,12 +194,13 @@ class BufferSnapshot:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class RiskAssessment:
     tier: RiskTier
     score: float
     flagged_keywords: List[str]
     notes: List[str] = field(default_factory=list)
+    resource_hits: List[Dict[str, str]] = field(default_factory=list)
 
     def to_dict(self) -> Dict[str, object]:
         return {
@@ -151,10 +208,11 @@ class RiskAssessment:
             "score": self.score,
             "flagged_keywords": self.flagged_keywords,
             "notes": self.notes,
+            "resource_hits": self.resource_hits,
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class SentimentResult:
     score: float
     band: SentimentBand
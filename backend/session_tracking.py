@@ -2,10 +2,11 @@ from __future__ import annotations
 
 import os
 import uuid
-from dataclasses import dataclass
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
 from typing import Any, Callable, Dict, List, Optional, Sequence
 
-from .analysis import RiskAdapter, RiskClassifier, SentimentAnalyzer
+from .analysis import RiskAdapter, RiskClassifier, SentimentAnalyzer, tokenize
 from .models import (
     BufferSnapshot,
     MessageRecord,
@@ -42,20 +43,76 @@ RISK_SEVERITY = {
     RiskTier.CRISIS: 3,
 }
 
+# Most severe first, so the max-tier scan can stop at the first tier
+# with a nonzero count.
+_TIERS_BY_SEVERITY_DESC = sorted(RiskTier, key=RISK_SEVERITY.get, reverse=True)
+
+
+_TRUTHY = frozenset({"1", "true", "yes", "on"})
+
 
 def _env_flag(name: str, default: bool = False) -> bool:
     raw = os.environ.get(name)
     if raw is None:
         return default
-    return raw.strip().lower() in {"1", "true", "yes", "on"}
+    return raw.strip().lower() in _TRUTHY
+
+
+def refresh_env_defaults() -> None:
+    """Re-read the CONSULTX_* environment defaults.
+
+    They are captured once at import so every SessionTracker construction
+    is not re-probing the environment; tests that tweak the variables can
+    call this to pick up the change.
+    """
+    global _DEFAULT_ENABLE_RAG, _DEFAULT_RAG_AUTOREPLY, _DEFAULT_RAG_COUNTRY
+    global _DEFAULT_RAG_MODEL, _DEFAULT_RAG_K, _DEFAULT_RAG_GUARDRAILS
+    _DEFAULT_ENABLE_RAG = _env_flag("CONSULTX_ENABLE_RAG", True)
+    _DEFAULT_RAG_AUTOREPLY = _env_flag("CONSULTX_RAG_AUTOREPLY", True)
+    _DEFAULT_RAG_COUNTRY = os.environ.get("CONSULTX_RAG_COUNTRY", "US")
+    _DEFAULT_RAG_MODEL = os.environ.get("CONSULTX_RAG_MODEL", "gemini-2.0-flash")
+    try:
+        _DEFAULT_RAG_K = int(os.environ.get("CONSULTX_RAG_K", "2"))
+    except ValueError:
+        _DEFAULT_RAG_K = 2
+    _DEFAULT_RAG_GUARDRAILS = _env_flag("CONSULTX_RAG_GUARDRAILS", True)
+
+
+refresh_env_defaults()
+
+
+# Indexed by (score > 0.1) - (score < -0.1) + 1: branchless banding for a
+# score distribution that sits near the thresholds.
+_BANDS = (SentimentBand.NEGATIVE, SentimentBand.NEUTRAL, SentimentBand.POSITIVE)
 
 
 def _sentiment_band_from_score(score: float) -> SentimentBand:
-    if score > 0.1:
-        return SentimentBand.POSITIVE
-    if score < -0.1:
-        return SentimentBand.NEGATIVE
-    return SentimentBand.NEUTRAL
+    return _BANDS[(score > 0.1) - (score < -0.1) + 1]
+
+
+@dataclass(slots=True)
+class _MetricsState:
+    """Running per-session metric accumulators.
+
+    Folding each new message into these keeps append_message O(1) in
+    session length instead of rescanning every stored message per turn.
+    """
+
+    message_count: int = 0
+    user_turns: int = 0
+    assistant_turns: int = 0
+    sentiment_total: float = 0.0
+    # keyed on the enum members themselves; .value is only paid when the
+    # counts are serialized into SessionMetrics
+    tier_counts: Dict[RiskTier, int] = field(
+        default_factory=lambda: {tier: 0 for tier in RiskTier}
+    )
+    band_counts: Dict[SentimentBand, int] = field(
+        default_factory=lambda: {band: 0 for band in SentimentBand}
+    )
+    flagged_keywords: set = field(default_factory=set)
+    # trend notes only ever look at the last three tiers
+    recent_risk: deque = field(default_factory=lambda: deque(maxlen=3))
 
 
 @dataclass
@@ -90,20 +147,33 @@ class SessionTracker:
         self.buffer_size = buffer_size
         self.sentiment_analyzer = sentiment_analyzer or SentimentAnalyzer()
         self.risk_classifier = risk_classifier or RiskClassifier()
-        self.rag_enabled = enable_rag if enable_rag is not None else _env_flag("CONSULTX_ENABLE_RAG", True)
-        self.rag_auto_reply = rag_auto_reply if rag_auto_reply is not None else _env_flag("CONSULTX_RAG_AUTOREPLY", True)
-        self.rag_country_code = rag_country_code or os.environ.get("CONSULTX_RAG_COUNTRY", "US")
-        self.rag_model = rag_model or os.environ.get("CONSULTX_RAG_MODEL", "gemini-2.0-flash")
-        if rag_k is not None:
-            self.rag_k = rag_k
-        else:
-            try:
-                self.rag_k = int(os.environ.get("CONSULTX_RAG_K", "2"))
-            except ValueError:
-                self.rag_k = 2
-        self.rag_guardrails = rag_guardrails if rag_guardrails is not None else _env_flag("CONSULTX_RAG_GUARDRAILS", True)
+        self.rag_enabled = enable_rag if enable_rag is not None else _DEFAULT_ENABLE_RAG
+        self.rag_auto_reply = rag_auto_reply if rag_auto_reply is not None else _DEFAULT_RAG_AUTOREPLY
+        self.rag_country_code = rag_country_code or _DEFAULT_RAG_COUNTRY
+        self.rag_model = rag_model or _DEFAULT_RAG_MODEL
+        self.rag_k = rag_k if rag_k is not None else _DEFAULT_RAG_K
+        self.rag_guardrails = rag_guardrails if rag_guardrails is not None else _DEFAULT_RAG_GUARDRAILS
         self._rag_runner = rag_runner
         self._rag_error: str | None = None
+        if rag_runner is None and self.rag_enabled:
+            # resolve the adapter once up front; _load_rag_runner then
+            # reduces to an attribute read on every RAG turn
+            try:
+                from .core_adapter import run_therapy_turn
+            except Exception as exc:  # pragma: no cover - optional dependency path
+                self._rag_error = str(exc)
+            else:
+                self._rag_runner = run_therapy_turn
+        self._metrics_state: Dict[str, _MetricsState] = {}
+        # In-process tail of each active session's messages; only the
+        # tracker writes, so this mirrors storage without re-querying the
+        # same few rows several times per turn.
+        self._ring: Dict[str, deque] = {}
+        self._ring_capacity = max(self.buffer_size, 10)
+        # Prompt-context strings are pure functions of the message list;
+        # keying on message_count makes stale entries unreachable without
+        # explicit invalidation.
+        self._context_cache: "OrderedDict[tuple, str]" = OrderedDict()
 
     # Session lifecycle ---------------------------------------------------
 
@@ -119,6 +189,8 @@ class SessionTracker:
         )
         self.storage.create_session(session)
         self.storage.save_buffer(BufferSnapshot(session_id=session.id, messages=[], capacity=self.buffer_size))
+        self._metrics_state[session.id] = _MetricsState()
+        self._ring[session.id] = deque(maxlen=self._ring_capacity)
         return session
 
     def get_session(self, session_id: str) -> SessionRecord:
@@ -136,11 +208,15 @@ class SessionTracker:
         return self.storage.list_sessions(user_id=user_id, status=status)
 
     def end_session(self, session_id: str) -> SessionSummary:
-        session = self.get_session(session_id)
+        session, messages = self.storage.get_session_with_messages(session_id)
+        if not session:
+            raise SessionNotFound(f"Session '{session_id}' not found.")
         if session.status == SessionStatus.ENDED:
             return self.get_summary(session_id)
 
-        metrics, flagged = self._recalculate_metrics(session_id)
+        metrics, flagged = self._recalculate_metrics(session_id, messages=messages)
+        self._metrics_state.pop(session_id, None)
+        self._ring.pop(session_id, None)
         self.storage.update_session(
             session_id,
             status=SessionStatus.ENDED,
@@ -168,10 +244,10 @@ class SessionTracker:
         rag_requested = use_rag if use_rag is not None else self.rag_enabled
         auto_respond = auto_reply if auto_reply is not None else self.rag_auto_reply
 
-        sentiment = self.sentiment_analyzer.score(content)
-        recent_messages = self.storage.recent_messages(session_id, self.buffer_size)
-        recent_tiers = [m.risk_tier for m in recent_messages]
-        assessment = self.risk_classifier.assess(content, sentiment, recent_tiers)
+        pre_tok = tokenize(content)
+        sentiment = self.sentiment_analyzer.score(content, pre_tok=pre_tok)
+        recent_tiers = [m.risk_tier for m in self._recent(session_id, self.buffer_size)]
+        assessment = self.risk_classifier.assess(content, sentiment, recent_tiers, pre_tok=pre_tok)
 
         rag_result: Dict[str, Any] | None = None
         rag_assessment: RiskAssessment | None = None
@@ -207,16 +283,22 @@ class SessionTracker:
             flagged_keywords=assessment.flagged_keywords,
             created_at=utc_now(),
         )
+        # seed the running metrics before the insert so the new message is
+        # not double counted when the state has to be rebuilt from storage
+        state = self._ensure_metrics_state(session_id)
         saved_message = self.storage.insert_message(message)
+        self._ensure_ring(session_id).append(saved_message)
         self.storage.update_session(session_id, active_risk_tier=assessment.tier)
         buffer = self._update_buffer(session_id)
-        metrics, _ = self._recalculate_metrics(session_id)
+        self._fold_message(state, saved_message)
+        metrics, _ = self._emit_metrics(session_id, state)
 
         assistant_message: MessageRecord | None = None
         if rag_result and rag_result.get("reply") and auto_respond and sender == SenderRole.USER:
             assistant_message = self._append_assistant_reply(session_id, rag_result["reply"])
             buffer = self._update_buffer(session_id)
-            metrics, _ = self._recalculate_metrics(session_id)
+            self._fold_message(state, assistant_message)
+            metrics, _ = self._emit_metrics(session_id, state)
 
         return MessageAppendResult(
             message=saved_message,
@@ -228,15 +310,17 @@ class SessionTracker:
         )
 
     def get_messages(self, session_id: str) -> List[MessageRecord]:
-        self.get_session(session_id)  # ensure exists
-        return self.storage.list_messages(session_id)
+        session, messages = self.storage.get_session_with_messages(session_id)
+        if not session:
+            raise SessionNotFound(f"Session '{session_id}' not found.")
+        return messages
 
     def get_buffer(self, session_id: str) -> BufferSnapshot:
         buffer = self.storage.load_buffer(session_id)
         if buffer:
             return buffer
         self.get_session(session_id)  # raises if missing
-        recent = self.storage.recent_messages(session_id, self.buffer_size)
+        recent = self._recent(session_id, self.buffer_size)
         snapshot = BufferSnapshot(session_id=session_id, messages=recent, capacity=self.buffer_size)
         self.storage.save_buffer(snapshot)
         return snapshot
@@ -244,14 +328,6 @@ class SessionTracker:
     # RAG integration ----------------------------------------------------
 
     def _load_rag_runner(self) -> Optional[Callable[..., Dict[str, Any]]]:
-        if self._rag_runner:
-            return self._rag_runner
-        try:
-            from .core_adapter import run_therapy_turn
-        except Exception as exc:  # pragma: no cover - optional dependency path
-            self._rag_error = str(exc)
-            return None
-        self._rag_runner = run_therapy_turn
         return self._rag_runner
 
     def _run_rag_turn(
@@ -282,7 +358,27 @@ class SessionTracker:
             self._rag_error = str(exc)
             return {"error": str(exc)}
 
+    _CONTEXT_CACHE_MAX = 64
+
+    def _context_cached(self, key: tuple, build: Callable[[], str]) -> str:
+        cache = self._context_cache
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        value = build()
+        cache[key] = value
+        if len(cache) > self._CONTEXT_CACHE_MAX:
+            cache.popitem(last=False)
+        return value
+
     def _build_history_summary(self, session_id: str) -> str:
+        count = self._ensure_metrics_state(session_id).message_count
+        return self._context_cached(
+            ("hist", session_id, count), lambda: self._history_summary(session_id)
+        )
+
+    def _history_summary(self, session_id: str) -> str:
         metrics = self.storage.get_metrics(session_id)
         if not metrics:
             return ""
@@ -295,9 +391,16 @@ class SessionTracker:
         return " | ".join(parts)
 
     def _build_transcript_block(self, session_id: str, max_pairs: int = 5) -> str:
-        recent = self.storage.recent_messages(session_id, max_pairs * 2)
+        count = self._ensure_metrics_state(session_id).message_count
+        return self._context_cached(
+            ("transcript", session_id, count, max_pairs),
+            lambda: self._transcript_block(session_id, max_pairs),
+        )
+
+    def _transcript_block(self, session_id: str, max_pairs: int) -> str:
+        recent = self._recent(session_id, max_pairs * 2)
         lines: List[str] = []
-        for message in recent[-max_pairs * 2 :]:
+        for message in recent:
             if message.sender == SenderRole.USER:
                 prefix = "User"
             elif message.sender == SenderRole.ASSISTANT:
@@ -342,23 +445,28 @@ class SessionTracker:
         if RISK_SEVERITY[secondary.tier] > RISK_SEVERITY[tier]:
             tier = secondary.tier
         score = max(primary.score, secondary.score)
-        flagged = sorted(set(primary.flagged_keywords + secondary.flagged_keywords))
+        flagged = sorted(set(primary.flagged_keywords).union(secondary.flagged_keywords))
         notes = list(primary.notes)
+        seen = set(notes)
         for note in secondary.notes:
-            if note not in notes:
+            if note not in seen:
+                seen.add(note)
                 notes.append(note)
         return RiskAssessment(
             tier=tier,
             score=round(score, 3),
             flagged_keywords=flagged,
             notes=notes,
+            # The RAG-side assessment carries no resource hits; keep the
+            # local scan's so merged turns still suggest resources.
+            resource_hits=primary.resource_hits,
         )
 
     def _append_assistant_reply(self, session_id: str, reply: str) -> MessageRecord:
-        sentiment = self.sentiment_analyzer.score(reply)
-        recent_messages = self.storage.recent_messages(session_id, self.buffer_size)
-        recent_tiers = [m.risk_tier for m in recent_messages]
-        assessment = self.risk_classifier.assess(reply, sentiment, recent_tiers)
+        pre_tok = tokenize(reply)
+        sentiment = self.sentiment_analyzer.score(reply, pre_tok=pre_tok)
+        recent_tiers = [m.risk_tier for m in self._recent(session_id, self.buffer_size)]
+        assessment = self.risk_classifier.assess(reply, sentiment, recent_tiers, pre_tok=pre_tok)
         message = MessageRecord(
             id=None,
             session_id=session_id,
@@ -371,6 +479,7 @@ class SessionTracker:
             created_at=utc_now(),
         )
         saved = self.storage.insert_message(message)
+        self._ensure_ring(session_id).append(saved)
         self.storage.update_session(session_id)  # bump updated_at without lowering risk
         return saved
 
@@ -395,55 +504,85 @@ class SessionTracker:
     # Summaries -----------------------------------------------------------
 
     def get_summary(self, session_id: str) -> SessionSummary:
-        session = self.get_session(session_id)
+        session, messages = self.storage.get_session_with_messages(session_id)
+        if not session:
+            raise SessionNotFound(f"Session '{session_id}' not found.")
         metrics = self.storage.get_metrics(session_id)
-        flagged = self._collect_flagged_keywords(session_id)
-        if not metrics:
-            metrics, flagged = self._recalculate_metrics(session_id)
+        if metrics:
+            keywords = set()
+            for message in messages:
+                keywords.update(message.flagged_keywords)
+            flagged = sorted(keywords)
+        else:
+            metrics, flagged = self._recalculate_metrics(session_id, messages=messages)
         return self._build_summary(session, metrics, flagged_keywords=flagged)
 
     # Internal helpers ----------------------------------------------------
 
     def _update_buffer(self, session_id: str) -> BufferSnapshot:
-        recent = self.storage.recent_messages(session_id, self.buffer_size)
+        recent = self._recent(session_id, self.buffer_size)
         snapshot = BufferSnapshot(session_id=session_id, messages=recent, capacity=self.buffer_size)
         self.storage.save_buffer(snapshot)
         return snapshot
 
-    def _collect_flagged_keywords(self, session_id: str) -> List[str]:
-        messages = self.storage.list_messages(session_id)
-        keywords = set()
-        for message in messages:
-            keywords.update(message.flagged_keywords)
-        return sorted(keywords)
-
-    def _recalculate_metrics(self, session_id: str) -> tuple[SessionMetrics, List[str]]:
-        messages = self.storage.list_messages(session_id)
-        message_count = len(messages)
-        user_turns = sum(1 for m in messages if m.sender == SenderRole.USER)
-        assistant_turns = sum(1 for m in messages if m.sender == SenderRole.ASSISTANT)
-        avg_sentiment = round(sum(m.sentiment_score for m in messages) / message_count, 3) if message_count else 0.0
-
-        tier_counts = {tier.value: 0 for tier in RiskTier}
-        band_counts = {band.value: 0 for band in SentimentBand}
-        flagged_keywords = set()
-        recent_risk = []
-        for message in messages:
-            tier_counts[message.risk_tier.value] += 1
-            band = _sentiment_band_from_score(message.sentiment_score)
-            band_counts[band.value] += 1
-            flagged_keywords.update(message.flagged_keywords)
-            recent_risk.append(message.risk_tier)
+    @staticmethod
+    def _fold_message(state: _MetricsState, message: MessageRecord) -> None:
+        """Fold a single new message into the running accumulators."""
+        state.message_count += 1
+        if message.sender == SenderRole.USER:
+            state.user_turns += 1
+        elif message.sender == SenderRole.ASSISTANT:
+            state.assistant_turns += 1
+        state.sentiment_total += message.sentiment_score
+        state.tier_counts[message.risk_tier] += 1
+        state.band_counts[_sentiment_band_from_score(message.sentiment_score)] += 1
+        state.flagged_keywords.update(message.flagged_keywords)
+        state.recent_risk.append(message.risk_tier)
+
+    def _ensure_ring(self, session_id: str) -> deque:
+        """In-process message tail, seeded from storage once per session."""
+        ring = self._ring.get(session_id)
+        if ring is None:
+            ring = deque(
+                self.storage.recent_messages(session_id, self._ring_capacity),
+                maxlen=self._ring_capacity,
+            )
+            self._ring[session_id] = ring
+        return ring
+
+    def _recent(self, session_id: str, n: int) -> List[MessageRecord]:
+        """Last n messages without a storage round-trip."""
+        ring = self._ensure_ring(session_id)
+        tail = list(ring)
+        return tail if n >= len(tail) else tail[-n:]
+
+    def _ensure_metrics_state(self, session_id: str) -> _MetricsState:
+        """Running state for the session, rebuilt from storage once if the
+        tracker has not seen this session before (e.g. after a restart)."""
+        state = self._metrics_state.get(session_id)
+        if state is None:
+            state = _MetricsState()
+            for message in self.storage.list_messages(session_id):
+                self._fold_message(state, message)
+            self._metrics_state[session_id] = state
+        return state
+
+    def _emit_metrics(self, session_id: str, state: _MetricsState) -> tuple[SessionMetrics, List[str]]:
+        """Materialize SessionMetrics from the accumulators and persist it."""
+        avg_sentiment = (
+            round(state.sentiment_total / state.message_count, 3)
+            if state.message_count else 0.0
+        )
 
-        max_risk_tier = RiskTier.OK
-        for tier in RiskTier:
-            if tier_counts[tier.value] and RISK_SEVERITY[tier] >= RISK_SEVERITY[max_risk_tier]:
-                max_risk_tier = tier
+        max_risk_tier = next(
+            (tier for tier in _TIERS_BY_SEVERITY_DESC if state.tier_counts[tier]),
+            RiskTier.OK,
+        )
 
         trend_notes: List[str] = []
+        recent_risk = state.recent_risk
         if recent_risk:
-            last_three = recent_risk[-3:]
-            if all(tier in {RiskTier.CAUTION, RiskTier.HIGH, RiskTier.CRISIS} for tier in last_three):
+            if all(tier in {RiskTier.CAUTION, RiskTier.HIGH, RiskTier.CRISIS} for tier in recent_risk):
                 trend_notes.append("Sustained elevated risk across last three turns.")
             if len(recent_risk) >= 2 and RISK_SEVERITY[recent_risk[-1]] > RISK_SEVERITY[recent_risk[-2]]:
                 trend_notes.append("Risk climbing on most recent turn.")
@@ -451,24 +590,38 @@ class SessionTracker:
                 trend_notes.append("Overall negative sentiment.")
 
         suggested_resources = self.risk_classifier.suggest_resources(
-            flagged_keywords,
+            state.flagged_keywords,
             max_risk_tier,
         )
 
         metrics = SessionMetrics(
             session_id=session_id,
-            message_count=message_count,
-            user_turns=user_turns,
-            assistant_turns=assistant_turns,
+            message_count=state.message_count,
+            user_turns=state.user_turns,
+            assistant_turns=state.assistant_turns,
             avg_sentiment=avg_sentiment,
             max_risk_tier=max_risk_tier,
-            tier_counts=tier_counts,
-            band_counts=band_counts,
+            tier_counts={tier.value: count for tier, count in state.tier_counts.items()},
+            band_counts={band.value: count for band, count in state.band_counts.items()},
             trend_notes=trend_notes,
             suggested_resources=suggested_resources,
         )
         self.storage.upsert_metrics(metrics)
-        return metrics, sorted(flagged_keywords)
+        return metrics, sorted(state.flagged_keywords)
+
+    def _recalculate_metrics(
+        self,
+        session_id: str,
+        messages: Optional[List[MessageRecord]] = None,
+    ) -> tuple[SessionMetrics, List[str]]:
+        """Authoritative full recompute; also refreshes the running state."""
+        if messages is None:
+            messages = self.storage.list_messages(session_id)
+        state = _MetricsState()
+        for message in messages:
+            self._fold_message(state, message)
+        self._metrics_state[session_id] = state
+        return self._emit_metrics(session_id, state)
 
     def _build_summary(
         self,
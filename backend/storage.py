@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import functools
 import json
 import sqlite3
+import threading
 from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import Generator, List, Optional
+from typing import Generator, List, Optional, Tuple
 
 from .models import (
     BufferSnapshot,
@@ -25,17 +27,38 @@ class SessionStorage:
     def __init__(self, db_path: str = "consultx.db") -> None:
         self.db_path = db_path
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
         self._initialise()
+        # Per-instance memoization of user lookups; users are immutable once
+        # created, so the cache only needs clearing when one is added.
+        self.get_user = functools.lru_cache(maxsize=256)(self._get_user_uncached)
+
+    def _thread_conn(self) -> sqlite3.Connection:
+        """One long-lived connection per thread.
+
+        Opening a connection per operation paid connect + pragma setup on
+        every query and defeated sqlite3's per-connection statement cache.
+        WAL mode lets the server threads read while another writes, and
+        synchronous=NORMAL skips the per-commit fsync WAL makes redundant.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
 
     @contextmanager
     def _connect(self) -> Generator[sqlite3.Connection, None, None]:
-        conn = sqlite3.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES)
-        conn.row_factory = sqlite3.Row
+        conn = self._thread_conn()
         try:
             yield conn
             conn.commit()
-        finally:
-            conn.close()
+        except Exception:
+            conn.rollback()
+            raise
 
     def _initialise(self) -> None:
         with self._connect() as conn:
@@ -84,6 +107,22 @@ class SessionStorage:
                     capacity INTEGER NOT NULL,
                     FOREIGN KEY (session_id) REFERENCES sessions(id)
                 );
+
+                CREATE TABLE IF NOT EXISTS users (
+                    name TEXT PRIMARY KEY,
+                    password TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS mood_entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    mood TEXT NOT NULL
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_mood_entries_user
+                    ON mood_entries(user_id);
                 """
             )
 
@@ -198,6 +237,27 @@ class SessionStorage:
         message.id = message_id
         return message
 
+    def get_session_with_messages(
+        self, session_id: str
+    ) -> Tuple[Optional[SessionRecord], List[MessageRecord]]:
+        """Fetch a session and its full message list in one transaction.
+
+        Saves callers a separate existence-check round-trip and closes the
+        window where messages could be appended between the two reads.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM sessions WHERE id = ?",
+                (session_id,),
+            ).fetchone()
+            if not row:
+                return None, []
+            rows = conn.execute(
+                "SELECT * FROM messages WHERE session_id = ? ORDER BY id ASC",
+                (session_id,),
+            ).fetchall()
+        return _row_to_session(row), [_row_to_message(r) for r in rows]
+
     def list_messages(self, session_id: str) -> List[MessageRecord]:
         with self._connect() as conn:
             rows = conn.execute(
@@ -269,6 +329,47 @@ class SessionStorage:
             return None
         return _row_to_metrics(row)
 
+    # Users & mood entries -------------------------------------------------
+
+    def _get_user_uncached(self, name: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT name, password FROM users WHERE name = ?",
+                (name,),
+            ).fetchone()
+        if not row:
+            return None
+        return {"name": row["name"], "password": row["password"]}
+
+    def create_user(self, name: str, password: str) -> bool:
+        """Insert a user; returns False if the name is already taken."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO users (name, password, created_at) VALUES (?, ?, ?)",
+                    (name, password, utc_now().isoformat()),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        self.get_user.cache_clear()
+        return True
+
+    def list_mood_entries(self, user_id: str) -> List[dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT date, mood FROM mood_entries WHERE user_id = ? ORDER BY id ASC",
+                (user_id,),
+            ).fetchall()
+        return [{"date": row["date"], "mood": row["mood"]} for row in rows]
+
+    def add_mood_entry(self, user_id: str, date: str, mood: str) -> dict:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO mood_entries (user_id, date, mood) VALUES (?, ?, ?)",
+                (user_id, date, mood),
+            )
+        return {"user_id": user_id, "date": date, "mood": mood}
+
     # Buffer --------------------------------------------------------------
 
     def save_buffer(self, snapshot: BufferSnapshot) -> None:
@@ -0,0 +1,76 @@
+import unittest
+
+from backend.analysis import RiskClassifier, SentimentAnalyzer
+from backend.models import RiskTier
+
+
+class KeywordScanTestCase(unittest.TestCase):
+    """Pin the automaton's matching semantics against the old per-tier scans."""
+
+    def setUp(self):
+        self.classifier = RiskClassifier()
+        self.sentiment = SentimentAnalyzer()
+
+    def _assess(self, text):
+        return self.classifier.assess(text, self.sentiment.score(text))
+
+    def test_whole_word_keyword_matches(self):
+        result = self._assess("I feel like I could die of embarrassment.")
+        self.assertEqual(result.tier, RiskTier.HIGH)
+        self.assertIn("die", result.flagged_keywords)
+
+    def test_whole_word_keyword_ignores_substrings(self):
+        # "die" inside "died" and "cut" inside "cutting" must not fire.
+        result = self._assess("My houseplant died after I stopped cutting back its leaves.")
+        self.assertNotIn("die", result.flagged_keywords)
+        self.assertNotIn("cut", result.flagged_keywords)
+        self.assertEqual(result.tier, RiskTier.OK)
+
+    def test_hyphenated_keyword_matches(self):
+        result = self._assess("I have been thinking about self-harm again.")
+        self.assertEqual(result.tier, RiskTier.HIGH)
+        self.assertIn("self-harm", result.flagged_keywords)
+
+    def test_crisis_phrase_matches_as_substring(self):
+        result = self._assess("Honestly I think about ending it all sometimes.")
+        self.assertEqual(result.tier, RiskTier.CRISIS)
+        self.assertIn("ending it all", result.flagged_keywords)
+        self.assertEqual(result.score, 1.0)
+
+    def test_crisis_outranks_lower_tiers(self):
+        result = self._assess("I feel hopeless and want to end my life.")
+        self.assertEqual(result.tier, RiskTier.CRISIS)
+        self.assertIn("end my life", result.flagged_keywords)
+
+    def test_caution_keyword_sets_caution_tier(self):
+        result = self._assess("I feel completely overwhelmed by work.")
+        self.assertEqual(result.tier, RiskTier.CAUTION)
+        self.assertIn("overwhelmed", result.flagged_keywords)
+
+    def test_resource_hits_collected_during_scan(self):
+        result = self._assess("Everything feels hopeless and I am overwhelmed.")
+        labels = {res["label"] for res in result.resource_hits}
+        self.assertIn("Grounding exercise: 5-4-3-2-1 method", labels)
+        self.assertIn("Guided journaling prompts for overwhelm", labels)
+
+    def test_no_resource_hits_without_mapped_keywords(self):
+        result = self._assess("What a lovely calm afternoon this has been.")
+        self.assertEqual(result.resource_hits, [])
+        self.assertEqual(result.flagged_keywords, [])
+
+    def test_repeated_keyword_flagged_once(self):
+        result = self._assess("I feel numb, just numb, totally numb.")
+        self.assertEqual(result.flagged_keywords.count("numb"), 1)
+
+    def test_might_match_never_rejects_real_hits(self):
+        # The Bloom prefilter may pass clean text (str hashing is salted
+        # per process, so negatives are probabilistic), but it must never
+        # reject text containing a pattern — that would drop detections.
+        automaton = RiskClassifier._AUTOMATON
+        self.assertTrue(automaton.might_match("thinking about suicide"))
+        self.assertTrue(automaton.might_match("i want to hurt myself"))
+        self.assertTrue(automaton.might_match("feeling hopeless tonight"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+from backend.storage import SessionStorage
+
+
+class UserStorageTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, path = tempfile.mkstemp(prefix="consultx-test-", suffix=".db")
+        os.close(fd)
+        self.db_path = path
+        self.storage = SessionStorage(self.db_path)
+
+    def tearDown(self):
+        try:
+            os.remove(self.db_path)
+        except FileNotFoundError:
+            pass
+
+    def test_create_and_get_user(self):
+        self.assertTrue(self.storage.create_user("alice", "pw-hash"))
+        user = self.storage.get_user("alice")
+        self.assertEqual(user, {"name": "alice", "password": "pw-hash"})
+
+    def test_get_unknown_user_returns_none(self):
+        self.assertIsNone(self.storage.get_user("nobody"))
+
+    def test_duplicate_user_returns_false(self):
+        self.assertTrue(self.storage.create_user("alice", "pw-hash"))
+        self.assertFalse(self.storage.create_user("alice", "other-hash"))
+        # The original row survives the rejected insert.
+        self.assertEqual(self.storage.get_user("alice")["password"], "pw-hash")
+
+    def test_get_user_cache_invalidated_by_create(self):
+        # A cached miss must not mask a user created afterwards: create_user
+        # clears the lru_cache wrapped around get_user.
+        self.assertIsNone(self.storage.get_user("bob"))
+        self.assertTrue(self.storage.create_user("bob", "pw-hash"))
+        user = self.storage.get_user("bob")
+        self.assertIsNotNone(user)
+        self.assertEqual(user["name"], "bob")
+
+    def test_get_user_served_from_cache(self):
+        self.storage.create_user("carol", "pw-hash")
+        first = self.storage.get_user("carol")
+        hits_before = self.storage.get_user.cache_info().hits
+        second = self.storage.get_user("carol")
+        self.assertIs(second, first)
+        self.assertEqual(self.storage.get_user.cache_info().hits, hits_before + 1)
+
+    def test_mood_entries_round_trip(self):
+        self.assertEqual(self.storage.list_mood_entries("alice"), [])
+        self.storage.add_mood_entry("alice", "2026-08-28", "calm")
+        self.storage.add_mood_entry("alice", "2026-08-29", "hopeful")
+        self.storage.add_mood_entry("dave", "2026-08-29", "tired")
+        entries = self.storage.list_mood_entries("alice")
+        self.assertEqual(
+            entries,
+            [
+                {"date": "2026-08-28", "mood": "calm"},
+                {"date": "2026-08-29", "mood": "hopeful"},
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()